@@ -1,10 +1,21 @@
-from django.contrib import admin
-from django.contrib.auth.models import User
+from django.contrib import admin, messages
 from django.contrib.gis.admin import GISModelAdmin
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import format_html
 from .models import (
     Role, AppUser, Building, Room, Tree, Equipment,
-    Asset, IncidentType, Incident, Maintenance
+    Asset, IncidentType, Incident, Maintenance, Job, ReportSnapshot
 )
+from .forms import AppUserAdminForm
+from .bulk import bulk_update_incidents, bulk_update_equipment
+from .jobs import enqueue
+from .reports import refusal_reason
+
+
+def _staff_for(request):
+    """AppUser tương ứng với tài khoản đang đăng nhập (để ghi vào phiếu bảo trì)."""
+    return AppUser.objects.filter(user=request.user).first()
 
 # 1. Các Model KHÔNG CÓ bản đồ (Dùng admin.ModelAdmin thường)
 @admin.register(Role)
@@ -13,35 +24,32 @@ class RoleAdmin(admin.ModelAdmin):
 
 @admin.register(AppUser)
 class AppUserAdmin(admin.ModelAdmin):
+    form = AppUserAdminForm
     list_display = ('username', 'role')
     list_filter = ('role',)
+    list_select_related = ('user', 'role')
+    search_fields = ('user__username',)
 
     def save_model(self, request, obj, form, change):
-        """
-        Mỗi khi bạn tạo / sửa AppUser trong Django Admin:
-        - Đồng bộ sang bảng User mặc định của Django để dùng cho đăng nhập (/login/)
-        - AppUser.password đã được hash trong model, nên copy thẳng sang User.password
-        """
+        # AppUser mới cần tài khoản Django đã có id trước khi lưu
+        form.save_user()
         super().save_model(request, obj, form, change)
 
-        # Tạo (hoặc lấy) user tương ứng trong bảng auth_user
-        user, created = User.objects.get_or_create(username=obj.username)
-        user.password = obj.password  # đã hash từ AppUser.save()
-        user.is_active = True
-
-        # Nếu role là Admin thì cho quyền staff để vào /admin/ nếu cần
-        if obj.role and obj.role.name.lower() == "admin":
-            user.is_staff = True
-        user.save()
-
 @admin.register(IncidentType)
 class IncidentTypeAdmin(admin.ModelAdmin):
     list_display = ('code', 'name', 'default_severity')
 
 @admin.register(Asset)
 class AssetAdmin(admin.ModelAdmin):
-    list_display = ('id', 'asset_type', 'get_asset_name')
+    list_display = ('id', 'asset_type', 'get_asset_name', 'risk_score', 'risk_updated_at')
     list_filter = ('asset_type',)
+    actions = ('recompute_risk',)
+
+    @admin.action(description="Tính lại điểm rủi ro")
+    def recompute_risk(self, request, queryset):
+        asset_ids = list(queryset.values_list('pk', flat=True))
+        enqueue('refresh_asset_health', {'asset_ids': asset_ids})
+        self.message_user(request, f"Đã đưa việc tính lại điểm rủi ro cho {len(asset_ids)} tài sản vào hàng đợi.")
     
     def get_asset_name(self, obj):
         return str(obj)
@@ -74,12 +82,123 @@ class TreeAdmin(GISModelAdmin):
 
 @admin.register(Equipment)
 class EquipmentAdmin(GISModelAdmin):
-    list_display = ('code', 'name', 'equipment_type', 'status', 'room')
+    list_display = ('code', 'name', 'equipment_type', 'status', 'room', 'last_maintenance')
     list_filter = ('status', 'equipment_type')
     search_fields = ('code', 'name')
+    actions = ('mark_repaired', 'mark_broken', 'mark_maintenance')
+
+    # Các action dưới đây cập nhật toàn bộ thiết bị được chọn bằng một câu UPDATE
+    @admin.action(description="Đánh dấu đã sửa xong (ghi phiếu bảo trì)")
+    def mark_repaired(self, request, queryset):
+        updated, logged = bulk_update_equipment(
+            queryset.values_list('pk', flat=True), 'good',
+            staff=_staff_for(request), log_maintenance=True,
+        )
+        self.message_user(request, f"Đã cập nhật {updated} thiết bị, ghi {logged} phiếu bảo trì.")
+
+    @admin.action(description="Đánh dấu hỏng")
+    def mark_broken(self, request, queryset):
+        updated, _ = bulk_update_equipment(queryset.values_list('pk', flat=True), 'broken')
+        self.message_user(request, f"Đã cập nhật {updated} thiết bị.")
+
+    @admin.action(description="Đánh dấu đang bảo trì")
+    def mark_maintenance(self, request, queryset):
+        updated, _ = bulk_update_equipment(queryset.values_list('pk', flat=True), 'maintenance')
+        self.message_user(request, f"Đã cập nhật {updated} thiết bị.")
 
 @admin.register(Incident)
 class IncidentAdmin(GISModelAdmin):
-    list_display = ('title', 'status', 'priority', 'reported_at', 'incident_type')
-    list_filter = ('status', 'priority', 'incident_type')
-    search_fields = ('title', 'description')
\ No newline at end of file
+    list_display = ('title', 'status', 'priority', 'reported_at', 'incident_type', 'duplicate_of')
+    list_filter = ('status', 'priority', 'incident_type', ('duplicate_of', admin.EmptyFieldListFilter))
+    raw_id_fields = ('duplicate_of',)
+    search_fields = ('title', 'description')
+    actions = (
+        'mark_processing', 'mark_closed', 'close_with_maintenance',
+        'set_priority_high', 'set_priority_medium', 'set_priority_low',
+    )
+
+    def _bulk_update(self, request, queryset, **changes):
+        updated, logged = bulk_update_incidents(queryset.values_list('pk', flat=True), **changes)
+        message = f"Đã cập nhật {updated} sự cố."
+        if logged:
+            message += f" Ghi {logged} phiếu bảo trì."
+        self.message_user(request, message)
+
+    @admin.action(description="Chuyển sang đang xử lý")
+    def mark_processing(self, request, queryset):
+        self._bulk_update(request, queryset, status='processing')
+
+    @admin.action(description="Đóng sự cố")
+    def mark_closed(self, request, queryset):
+        self._bulk_update(request, queryset, status='closed')
+
+    @admin.action(description="Đóng sự cố và ghi phiếu bảo trì cho tài sản")
+    def close_with_maintenance(self, request, queryset):
+        self._bulk_update(
+            request, queryset, status='closed',
+            staff=_staff_for(request), log_maintenance=True,
+        )
+
+    @admin.action(description="Đặt mức độ: Cao")
+    def set_priority_high(self, request, queryset):
+        self._bulk_update(request, queryset, priority='high')
+
+    @admin.action(description="Đặt mức độ: Trung bình")
+    def set_priority_medium(self, request, queryset):
+        self._bulk_update(request, queryset, priority='medium')
+
+    @admin.action(description="Đặt mức độ: Thấp")
+    def set_priority_low(self, request, queryset):
+        self._bulk_update(request, queryset, priority='low')
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'priority', 'attempts', 'run_after', 'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('locked_by', 'locked_at', 'last_error', 'created_at', 'finished_at')
+    actions = ('retry_jobs',)
+
+    @admin.action(description="Chạy lại các việc đã chọn")
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status='running').update(
+            status='queued', attempts=0, run_after=timezone.now(), finished_at=None
+        )
+        self.message_user(request, f"Đã đưa {updated} việc trở lại hàng đợi.")
+
+@admin.register(ReportSnapshot)
+class ReportSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('report_type', 'period_start', 'period_end', 'version', 'row_count', 'generated_at', 'downloads')
+    list_filter = ('report_type', 'period_start')
+    readonly_fields = (
+        'report_type', 'period_start', 'period_end', 'version', 'generated_at',
+        'row_count', 'summary', 'csv_file', 'pdf_file',
+    )
+    actions = ('regenerate',)
+
+    def has_add_permission(self, request):
+        # Báo cáo chỉ được tạo bởi `manage.py generate_reports` / việc nền
+        return False
+
+    @admin.display(description="Tải về")
+    def downloads(self, obj):
+        links = format_html('<a href="{}">CSV</a>', reverse('report_download', args=[obj.pk, 'csv']))
+        if obj.pdf_file:
+            links += format_html(' · <a href="{}">PDF</a>', reverse('report_download', args=[obj.pk, 'pdf']))
+        return links
+
+    @admin.action(description="Tạo lại báo cáo cho kỳ đã chọn (phiên bản mới)")
+    def regenerate(self, request, queryset):
+        periods, refused = {}, []
+        for report_type, period_end in queryset.order_by().values_list('report_type', 'period_end').distinct():
+            reason = refusal_reason(report_type, period_end)
+            if reason is None:
+                periods.setdefault(period_end, []).append(report_type)
+            else:
+                refused.append(reason)
+        for period_end, report_types in periods.items():
+            enqueue('generate_reports', {'report_types': report_types, 'period_end': period_end.isoformat()})
+        count = sum(len(report_types) for report_types in periods.values())
+        if count:
+            self.message_user(request, f"Đã đưa việc tạo lại {count} báo cáo vào hàng đợi.")
+        for reason in refused:
+            self.message_user(request, f"Bỏ qua: {reason}", messages.WARNING)
@@ -0,0 +1,138 @@
+"""
+Phân tích vùng phục vụ (coverage) trên khuôn viên, chạy hoàn toàn trong PostGIS.
+
+- equipment_coverage(): với mỗi tòa nhà, đếm thiết bị cùng loại / tình trạng
+  trong bán kính R mét ("tòa nhà nào không có máy chiếu còn tốt trong 50 m").
+- seat_coverage(): với mỗi tòa nhà, tổng số chỗ (Room.capacity) của các phòng
+  cùng loại trong bán kính đi bộ ("bao nhiêu chỗ phòng lab quanh mỗi tòa nhà").
+
+Mỗi phân tích là MỘT phép nối không gian: `&&` với ST_Expand dùng chỉ mục GiST
+trên geom để lọc thô, ST_DWithin trên geography tính khoảng cách chính xác theo mét.
+Kết quả (GeoJSON) được cache theo bộ tham số và phiên bản dữ liệu "spatial".
+"""
+import hashlib
+import json
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from .cache import get_data_version
+from .geo import GEOJSON_PRECISION, METERS_PER_DEGREE
+from .models import Building, Equipment, Room
+
+# Nhóm dữ liệu dùng trong khoá cache; tăng khi tòa nhà / phòng / thiết bị thay đổi
+DATA_NAMESPACE = "spatial"
+MAX_RADIUS_M = 2000
+
+COVERAGE_SQL = """
+SELECT b.id, b.name, ST_AsGeoJSON(b.geom, {precision}), {aggregates}
+FROM {building} AS b
+LEFT JOIN {target} AS t
+  ON {target_filter}
+ AND t.geom && ST_Expand(
+         b.geom,
+         %(radius_m)s / ({meters_per_degree} * GREATEST(cos(radians(ST_Y(ST_Centroid(b.geom)))), 0.01))
+     )
+ AND ST_DWithin(b.geom::geography, t.geom::geography, %(radius_m)s)
+GROUP BY b.id
+ORDER BY b.id
+"""
+
+
+def _clamp_radius(radius_m):
+    radius_m = float(radius_m)
+    if not math.isfinite(radius_m) or radius_m <= 0:
+        raise ValueError("Bán kính phải là số dương")
+    return min(radius_m, MAX_RADIUS_M)
+
+
+def _run_coverage(target, target_filter, aggregates, columns, params):
+    """
+    Chạy COVERAGE_SQL với model `target` và trả về chuỗi GeoJSON FeatureCollection,
+    mỗi feature là một tòa nhà với các cột tổng hợp trong properties.
+    """
+    sql = COVERAGE_SQL.format(
+        building=connection.ops.quote_name(Building._meta.db_table),
+        precision=GEOJSON_PRECISION,
+        aggregates=aggregates,
+        target=connection.ops.quote_name(target._meta.db_table),
+        target_filter=target_filter,
+        meters_per_degree=METERS_PER_DEGREE,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    features = []
+    for pk, name, geometry, *values in rows:
+        properties = dict(zip(columns, values))
+        properties["pk"] = pk
+        properties["name"] = name
+        features.append(
+            '{"type": "Feature", "id": %s, "properties": %s, "geometry": %s}'
+            % (json.dumps(pk), json.dumps(properties, ensure_ascii=False), geometry or "null")
+        )
+    return '{"type": "FeatureCollection", "features": [%s]}' % ", ".join(features)
+
+
+def _cached(analysis, params, compute):
+    # Băm tham số (có giá trị người dùng nhập) để khoá ngắn, không có khoảng
+    # trắng / ký tự điều khiển, dùng được với memcached
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    key = "coverage:{}:{}:{}".format(get_data_version(DATA_NAMESPACE), analysis, digest)
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.set(key, result, getattr(settings, "ANALYSIS_CACHE_TIMEOUT", 600))
+    return result
+
+
+def equipment_coverage(equipment_type, radius_m, statuses=("good",)):
+    """
+    GeoJSON các tòa nhà kèm `equipment_count`: số thiết bị loại equipment_type,
+    tình trạng thuộc statuses, nằm trong radius_m mét tính từ tòa nhà;
+    `covered` = False nghĩa là tòa nhà chưa được phục vụ.
+    """
+    valid_statuses = dict(Equipment.STATUS)
+    for status in statuses:
+        if status not in valid_statuses:
+            raise ValueError(f"Tình trạng thiết bị '{status}' không hợp lệ")
+    params = {
+        "equipment_type": equipment_type,
+        "statuses": sorted(statuses),
+        "radius_m": _clamp_radius(radius_m),
+    }
+
+    def compute():
+        return _run_coverage(
+            target=Equipment,
+            target_filter="t.equipment_type = %(equipment_type)s AND t.status = ANY(%(statuses)s)",
+            aggregates="count(t.id), count(t.id) > 0",
+            columns=("equipment_count", "covered"),
+            params=params,
+        )
+
+    return _cached("equipment", params, compute)
+
+
+def seat_coverage(radius_m, room_type="lab"):
+    """
+    GeoJSON các tòa nhà kèm `seats` (tổng Room.capacity) và `room_count` của
+    các phòng loại room_type trong radius_m mét tính từ tòa nhà.
+    """
+    if room_type not in dict(Room.ROOM_TYPES):
+        raise ValueError(f"Loại phòng '{room_type}' không hợp lệ")
+    params = {"room_type": room_type, "radius_m": _clamp_radius(radius_m)}
+
+    def compute():
+        return _run_coverage(
+            target=Room,
+            target_filter="t.room_type = %(room_type)s",
+            aggregates="COALESCE(sum(t.capacity), 0), count(t.id)",
+            columns=("seats", "room_count"),
+            params=params,
+        )
+
+    return _cached("seats", params, compute)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class HomeConfig(AppConfig):
     name = 'home'
+
+    def ready(self):
+        # Đăng ký signal cập nhật điểm rủi ro tài sản và các công việc nền
+        from . import signals, tasks  # noqa: F401
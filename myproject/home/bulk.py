@@ -0,0 +1,115 @@
+"""
+Thao tác hàng loạt cho sự cố và thiết bị (dùng cho admin action và API JSON).
+
+Mỗi thao tác đổi trạng thái là MỘT câu UPDATE; phiếu bảo trì (nếu có) được
+ghi bằng bulk_create và ngày bảo trì của thiết bị được cập nhật bằng một câu
+UPDATE khác, tất cả nằm trong cùng một transaction.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .analysis import DATA_NAMESPACE as SPATIAL_NAMESPACE
+from .cache import INCIDENTS, bump_on_commit, maintenance_namespace
+from .jobs import enqueue
+from .models import Equipment, Incident, Maintenance, Tree
+
+
+def _validate_choice(value, choices, field_name):
+    if value is None:
+        return
+    if not isinstance(value, str) or value not in dict(choices):
+        raise ValueError(f"Giá trị '{value}' không hợp lệ cho trường {field_name}")
+
+
+def _log_maintenance(asset_ids, staff, maintenance_type, note):
+    """
+    Ghi phiếu bảo trì cho danh sách tài sản và cập nhật ngày bảo trì tương ứng.
+    Trả về số phiếu bảo trì đã tạo.
+    """
+    _validate_choice(maintenance_type, Maintenance.MAINTENANCE_TYPES, "maintenance_type")
+    asset_ids = list(asset_ids)
+    today = timezone.localdate()
+
+    Maintenance.objects.bulk_create([
+        Maintenance(
+            asset_id=asset_id,
+            staff=staff,
+            maintenance_type=maintenance_type,
+            maintenance_date=today,
+            note=note,
+        )
+        for asset_id in asset_ids
+    ])
+    Equipment.objects.filter(asset__in=asset_ids).update(last_maintenance=today)
+    if maintenance_type == "trim":
+        Tree.objects.filter(asset__in=asset_ids).update(last_trimmed=today)
+    if staff is not None:
+        bump_on_commit(maintenance_namespace(staff.pk))
+    return len(asset_ids)
+
+
+@transaction.atomic
+def bulk_update_incidents(incident_ids, status=None, priority=None, staff=None,
+                          log_maintenance=False, maintenance_type="repair", note=None):
+    """
+    Đổi trạng thái / mức độ ưu tiên cho nhiều sự cố cùng lúc.
+
+    - incident_ids: danh sách id (hoặc queryset values_list) các sự cố.
+    - log_maintenance: nếu True, ghi một phiếu bảo trì cho mỗi tài sản liên quan.
+
+    Trả về (số sự cố được cập nhật, số phiếu bảo trì đã ghi).
+    """
+    _validate_choice(status, Incident.STATUS, "status")
+    _validate_choice(priority, Incident.PRIORITY, "priority")
+
+    # Chốt danh sách id trước khi UPDATE: nếu truyền vào một queryset lọc theo
+    # trạng thái thì sau khi cập nhật nó sẽ trả về tập bản ghi khác.
+    incident_ids = list(incident_ids)
+    changes = {}
+    if status:
+        changes["status"] = status
+    if priority:
+        changes["priority"] = priority
+
+    incidents = Incident.objects.filter(pk__in=incident_ids)
+    updated = incidents.update(**changes) if changes else 0
+
+    asset_ids = list(incidents.order_by().values_list("asset_id", flat=True).distinct())
+    logged = 0
+    if log_maintenance:
+        logged = _log_maintenance(asset_ids, staff, maintenance_type, note)
+    # UPDATE/bulk_create không phát signal nên tự đưa việc tính lại điểm rủi ro vào hàng đợi
+    if asset_ids:
+        enqueue("refresh_asset_health", {"asset_ids": asset_ids})
+    # ...và tự làm mới danh sách sự cố gần đây đã cache
+    bump_on_commit(INCIDENTS)
+    return updated, logged
+
+
+@transaction.atomic
+def bulk_update_equipment(equipment_ids, status, staff=None,
+                          log_maintenance=False, maintenance_type="repair", note=None):
+    """
+    Đổi trạng thái cho nhiều thiết bị cùng lúc (ví dụ đánh dấu đã sửa xong).
+
+    Nếu log_maintenance=True thì ghi phiếu bảo trì cho các thiết bị đã được
+    đăng ký là tài sản (Asset) và cập nhật Equipment.last_maintenance.
+
+    Trả về (số thiết bị được cập nhật, số phiếu bảo trì đã ghi).
+    """
+    _validate_choice(status, Equipment.STATUS, "status")
+
+    equipment_ids = list(equipment_ids)
+    equipment = Equipment.objects.filter(pk__in=equipment_ids)
+    updated = equipment.update(status=status)
+
+    asset_ids = list(equipment.filter(asset__isnull=False).values_list("asset__id", flat=True))
+    logged = 0
+    if log_maintenance:
+        logged = _log_maintenance(asset_ids, staff, maintenance_type, note)
+    # UPDATE/bulk_create không phát signal nên tự đưa việc tính lại điểm rủi ro vào hàng đợi
+    if asset_ids:
+        enqueue("refresh_asset_health", {"asset_ids": asset_ids})
+    # ...và tự làm mới cache phân tích coverage (phụ thuộc tình trạng thiết bị)
+    bump_on_commit(SPATIAL_NAMESPACE)
+    return updated, logged
@@ -0,0 +1,51 @@
+"""
+Phiên bản dữ liệu dùng làm một phần của khoá cache.
+
+Thay vì xoá từng khoá khi dữ liệu đổi, mỗi nhóm dữ liệu (namespace) có một số
+phiên bản; signal tăng số này khi model liên quan thay đổi, các khoá cũ tự
+không còn được đọc tới và hết hạn theo timeout.
+
+Số phiên bản nằm trong cache mặc định nên chỉ có hiệu lực giữa các tiến trình
+khi cache đó dùng chung (REDIS_URL trong settings); với LocMemCache, tiến trình
+khác thấy dữ liệu mới khi đoạn cache của nó hết hạn (LOCAL_CACHE_TIMEOUT).
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = "data-version:{}"
+
+# Các nhóm dữ liệu (ngoài "spatial" của home/analysis.py)
+CHOICES = "choices"          # danh sách lựa chọn Asset / IncidentType trong form
+INCIDENTS = "incidents"      # danh sách sự cố gần đây
+
+
+def maintenance_namespace(staff_id):
+    """Phiếu bảo trì của một nhân viên (danh sách "bảo trì gần đây" theo người dùng)."""
+    return f"maintenance:{staff_id}"
+
+
+def get_data_version(namespace):
+    key = VERSION_KEY.format(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_data_version(namespace):
+    key = VERSION_KEY.format(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Khoá chưa có (cache mới khởi động hoặc đã bị xoá)
+        cache.set(key, 2, timeout=None)
+        return 2
+
+
+def bump_on_commit(namespace):
+    """
+    Tăng phiên bản sau khi transaction hiện tại commit (ngay lập tức nếu không
+    trong transaction), tránh request khác kịp cache dữ liệu cũ dưới phiên bản mới.
+    """
+    transaction.on_commit(lambda: bump_data_version(namespace))
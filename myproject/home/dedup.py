@@ -0,0 +1,154 @@
+"""
+Phát hiện và gộp sự cố trùng lặp.
+
+Hai báo cáo được coi là trùng nếu cùng tài sản, hoặc vị trí cách nhau không
+quá INCIDENT_DEDUP_RADIUS_M mét, và được báo trong vòng
+INCIDENT_DEDUP_WINDOW_HOURS giờ.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.measure import D
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import INCIDENTS, bump_on_commit
+from .geo import METERS_PER_DEGREE
+from .models import Incident
+
+OPEN_STATUSES = ("open", "processing")
+PRIORITY_RANK = {"low": 0, "medium": 1, "high": 2}
+
+
+def dedup_radius_m():
+    return getattr(settings, "INCIDENT_DEDUP_RADIUS_M", 15)
+
+
+def dedup_window_hours():
+    return getattr(settings, "INCIDENT_DEDUP_WINDOW_HOURS", 48)
+
+
+def _radius_in_degrees(radius_m, latitude):
+    """
+    Đổi bán kính (m) sang độ theo chiều kinh độ (lớn hơn chiều vĩ độ),
+    dùng cho bộ lọc thô theo chỉ mục nên không bỏ sót ứng viên.
+    """
+    return radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+
+
+def find_duplicate_candidates(asset, geom, radius_m=None, window_hours=None):
+    """
+    Các sự cố đang mở (chưa bị gộp) có thể trùng với báo cáo mới,
+    sắp xếp theo khoảng cách tăng dần.
+
+    ST_DWithin theo độ dùng được chỉ mục GiST trên geom để lọc thô; khoảng cách
+    chính xác (mét) chỉ được tính lại trên các ứng viên còn lại.
+    """
+    radius_m = dedup_radius_m() if radius_m is None else radius_m
+    window_hours = dedup_window_hours() if window_hours is None else window_hours
+
+    candidates = Incident.objects.filter(
+        status__in=OPEN_STATUSES,
+        duplicate_of__isnull=True,
+        reported_at__gte=timezone.now() - timedelta(hours=window_hours),
+    )
+    if geom is None:
+        return candidates.filter(asset=asset).order_by("-reported_at")
+
+    return (
+        candidates
+        .filter(Q(asset=asset) | Q(geom__dwithin=(geom, _radius_in_degrees(radius_m, geom.y))))
+        .annotate(distance=Distance("geom", geom))
+        .filter(Q(asset=asset) | Q(distance__lte=D(m=radius_m)))
+        .select_related("asset", "incident_type")
+        .order_by("distance", "-reported_at")
+    )
+
+
+@transaction.atomic
+def merge_incident(incident, target):
+    """
+    Gộp báo cáo `incident` (mới hoặc đã lưu) vào sự cố gốc `target`:
+    đánh dấu trùng lặp, đóng báo cáo và nâng mức ưu tiên của sự cố gốc nếu cần.
+    """
+    incident.duplicate_of = target
+    incident.status = "closed"
+    incident.save()
+
+    if PRIORITY_RANK.get(incident.priority, 0) > PRIORITY_RANK.get(target.priority, 0):
+        Incident.objects.filter(pk=target.pk).update(priority=incident.priority)
+        target.priority = incident.priority
+
+
+DEDUPLICATE_SQL = """
+WITH pairs AS (
+    SELECT DISTINCT ON (later.id) later.id AS duplicate_id, earlier.id AS original_id
+    FROM {table} AS later
+    JOIN {table} AS earlier
+      ON (earlier.reported_at, earlier.id) < (later.reported_at, later.id)
+     AND earlier.reported_at >= later.reported_at - make_interval(hours => %(window_hours)s)
+     AND (
+          earlier.asset_id = later.asset_id
+          OR (
+              earlier.geom && ST_Expand(
+                  later.geom,
+                  %(radius_m)s / ({meters_per_degree} * GREATEST(cos(radians(ST_Y(later.geom))), 0.01))
+              )
+              AND ST_DWithin(earlier.geom::geography, later.geom::geography, %(radius_m)s)
+          )
+     )
+    WHERE later.duplicate_of_id IS NULL
+      AND earlier.duplicate_of_id IS NULL
+    ORDER BY later.id, earlier.reported_at, earlier.id
+)
+{action}
+"""
+
+FLATTEN_SQL = """
+UPDATE {table} AS i
+SET duplicate_of_id = parent.duplicate_of_id
+FROM {table} AS parent
+WHERE i.duplicate_of_id = parent.id
+  AND parent.duplicate_of_id IS NOT NULL
+"""
+
+
+def deduplicate_history(radius_m=None, window_hours=None, dry_run=False):
+    """
+    Gộp sự cố trùng lặp trong toàn bộ lịch sử bằng MỘT phép tự nối không gian
+    trong PostGIS (thay vì so sánh từng cặp trong Python).
+
+    Mỗi sự cố được gộp vào sự cố sớm nhất khớp với nó; chuỗi A <- B <- C sau đó
+    được làm phẳng để mọi bản trùng đều trỏ về sự cố gốc.
+    Trả về số sự cố bị đánh dấu trùng (hoặc sẽ bị, nếu dry_run).
+    """
+    params = {
+        "radius_m": float(dedup_radius_m() if radius_m is None else radius_m),
+        "window_hours": int(dedup_window_hours() if window_hours is None else window_hours),
+    }
+    table = connection.ops.quote_name(Incident._meta.db_table)
+
+    if dry_run:
+        action = "SELECT count(*) FROM pairs"
+    else:
+        action = (
+            f"UPDATE {table} AS i SET duplicate_of_id = pairs.original_id, status = 'closed' "
+            "FROM pairs WHERE i.id = pairs.duplicate_id"
+        )
+    sql = DEDUPLICATE_SQL.format(table=table, meters_per_degree=METERS_PER_DEGREE, action=action)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        if dry_run:
+            return cursor.fetchone()[0]
+        merged = cursor.rowcount
+
+        while True:
+            cursor.execute(FLATTEN_SQL.format(table=table))
+            if cursor.rowcount == 0:
+                break
+        bump_on_commit(INCIDENTS)
+    return merged
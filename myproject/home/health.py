@@ -0,0 +1,206 @@
+"""
+Chấm điểm rủi ro (sức khỏe) cho tài sản.
+
+Điểm từ 0 đến 100, càng cao càng rủi ro, kết hợp:
+- tình trạng hiện tại (Equipment.status / Tree.health_status),
+- tuổi tài sản (install_date / planted_date),
+- thời gian từ lần bảo trì gần nhất và tổng chi phí bảo trì (Maintenance),
+- sự cố đang mở / gần đây và mức nghiêm trọng (IncidentType.default_severity).
+
+Dữ liệu được tổng hợp bằng GROUP BY trong PostgreSQL, nạp thành các mảng
+NumPy theo cột rồi tính điểm vector hóa cho toàn bộ tài sản một lượt, thay vì
+lặp qua từng đối tượng model. Kết quả được ghi vào Asset.risk_score bằng một
+câu UPDATE ... FROM unnest(...) cho mỗi lô.
+
+Chỉ đọc các phân vùng nóng của Maintenance / Incident: dòng đã lưu trữ sang
+<bảng>_archive (home/partitioning.py, cũ hơn PARTITION_HOT_MONTHS tháng) không
+được tính. Với PARTITION_HOT_MONTHS >= 12 điều này không đổi điểm khoảng cách
+bảo trì (đã tối đa sau MAINTENANCE_GAP_DAYS) hay điểm sự cố (sự cố chưa đóng
+không bị lưu trữ, RECENT_INCIDENT_DAYS = 365), nhưng tổng chi phí bảo trì chỉ
+gồm các tháng còn nóng.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Count, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Asset, Incident, Maintenance
+
+# Trọng số của từng thành phần (tổng = 1)
+WEIGHTS = {
+    "status": 0.35,
+    "age": 0.15,
+    "maintenance_gap": 0.15,
+    "maintenance_cost": 0.10,
+    "incidents": 0.25,
+}
+
+# Điểm theo tình trạng hiện tại (0 = tốt, 1 = nguy hiểm / hỏng)
+STATUS_SCORES = {
+    "good": 0.0,
+    "maintenance": 0.5,
+    "broken": 1.0,
+    "diseased": 0.6,
+    "dangerous": 1.0,
+}
+
+# Tuổi thọ tham chiếu (ngày): tài sản đạt tuổi này có điểm tuổi tối đa
+EXPECTED_LIFETIME_DAYS = {"equipment": 8 * 365, "tree": 40 * 365}
+# Quá số ngày này chưa bảo trì thì điểm bảo trì tối đa
+MAINTENANCE_GAP_DAYS = 365
+# Tổng chi phí bảo trì (đ) ứng với điểm chi phí tối đa (thang logarit)
+COST_REFERENCE = 50_000_000
+# Tổng mức nghiêm trọng ứng với điểm sự cố tối đa
+SEVERITY_REFERENCE = 10
+# Mức nghiêm trọng cho sự cố không có loại
+DEFAULT_SEVERITY = 3
+# Sự cố (kể cả đã đóng) trong khoảng này được tính thêm một nửa mức nghiêm trọng
+RECENT_INCIDENT_DAYS = 365
+
+OPEN_STATUSES = ("open", "processing")
+UPDATE_BATCH_SIZE = 50_000
+
+
+def _columns(queryset, *fields):
+    """
+    Đọc các cột của queryset thành các tuple (mỗi cột một tuple) bằng values_list.
+    """
+    rows = list(queryset.values_list(*fields))
+    if not rows:
+        return [() for _ in fields]
+    return list(zip(*rows))
+
+
+def _scatter(ids, keys, values, fill, dtype):
+    """
+    Đặt `values` (theo khóa `keys`) vào mảng cùng thứ tự với `ids` (đã sắp xếp),
+    vị trí không có dữ liệu nhận giá trị `fill`.
+    """
+    result = np.full(len(ids), fill, dtype=dtype)
+    if len(keys):
+        keys = np.asarray(keys, dtype=np.int64)
+        positions = np.searchsorted(ids, keys)
+        found = positions < len(ids)
+        found[found] = ids[positions[found]] == keys[found]
+        result[positions[found]] = np.asarray(values, dtype=dtype)[found]
+    return result
+
+
+def _category_scores(labels, scores, default=0.0):
+    """
+    Ánh xạ mảng nhãn sang điểm; chỉ lặp trên các nhãn khác nhau (rất ít).
+    """
+    unique, inverse = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+    lookup = np.array([scores.get(label, default) for label in unique], dtype=float)
+    return lookup[inverse]
+
+
+def compute_scores(asset_ids=None):
+    """
+    Tính điểm rủi ro cho các tài sản (tất cả nếu asset_ids là None).
+    Trả về (mảng id tăng dần, mảng điểm tương ứng).
+    """
+    assets = Asset.objects.order_by("id")
+    maintenances = Maintenance.objects.order_by()
+    incidents = Incident.objects.filter(duplicate_of__isnull=True).order_by()
+    if asset_ids is not None:
+        asset_ids = list(asset_ids)
+        assets = assets.filter(id__in=asset_ids)
+        maintenances = maintenances.filter(asset_id__in=asset_ids)
+        incidents = incidents.filter(asset_id__in=asset_ids)
+
+    ids, asset_types, equipment_status, tree_status, installed, planted = _columns(
+        assets,
+        "id", "asset_type", "equipment__status", "tree__health_status",
+        "equipment__install_date", "tree__planted_date",
+    )
+    ids = np.asarray(ids, dtype=np.int64)
+    if not len(ids):
+        return ids, np.empty(0, dtype=float)
+
+    today = np.datetime64(timezone.localdate(), "D")
+    is_tree = np.asarray(asset_types, dtype=str) == "tree"
+
+    # 1. Tình trạng hiện tại
+    status = np.where(is_tree, np.asarray(tree_status, dtype=object), np.asarray(equipment_status, dtype=object))
+    status_score = _category_scores(status, STATUS_SCORES)
+
+    # 2. Tuổi tài sản (ngày sinh không rõ -> điểm 0)
+    born = np.where(
+        is_tree,
+        np.asarray(planted, dtype="datetime64[D]"),
+        np.asarray(installed, dtype="datetime64[D]"),
+    )
+    age_days = (today - born) / np.timedelta64(1, "D")
+    lifetime = np.where(is_tree, EXPECTED_LIFETIME_DAYS["tree"], EXPECTED_LIFETIME_DAYS["equipment"])
+    age_score = np.nan_to_num(np.clip(age_days / lifetime, 0, 1), nan=0.0)
+
+    # 3. Bảo trì: số ngày từ lần gần nhất (chưa từng bảo trì thì tính từ ngày lắp đặt/trồng)
+    m_ids, m_last, m_cost = _columns(
+        maintenances.values("asset_id").annotate(
+            last_date=Max("maintenance_date"),
+            total_cost=Coalesce(Sum("cost"), Value(Decimal("0"))),
+        ),
+        "asset_id", "last_date", "total_cost",
+    )
+    last_maintenance = _scatter(ids, m_ids, m_last, np.datetime64("NaT"), "datetime64[D]")
+    reference = np.where(np.isnat(last_maintenance), born, last_maintenance)
+    gap_days = (today - reference) / np.timedelta64(1, "D")
+    gap_score = np.nan_to_num(np.clip(gap_days / MAINTENANCE_GAP_DAYS, 0, 1), nan=1.0)
+
+    total_cost = _scatter(ids, m_ids, m_cost, 0.0, float)
+    cost_score = np.clip(np.log1p(total_cost) / np.log1p(COST_REFERENCE), 0, 1)
+
+    # 4. Sự cố: tổng mức nghiêm trọng sự cố đang mở + một nửa số sự cố gần đây
+    severity = Coalesce("incident_type__default_severity", Value(DEFAULT_SEVERITY))
+    i_ids, i_open_severity, i_recent = _columns(
+        incidents.values("asset_id").annotate(
+            open_severity=Coalesce(Sum(severity, filter=Q(status__in=OPEN_STATUSES)), Value(0)),
+            recent=Count("id", filter=Q(reported_at__gte=timezone.now() - timedelta(days=RECENT_INCIDENT_DAYS))),
+        ),
+        "asset_id", "open_severity", "recent",
+    )
+    open_severity = _scatter(ids, i_ids, i_open_severity, 0.0, float)
+    recent_incidents = _scatter(ids, i_ids, i_recent, 0.0, float)
+    incident_score = np.clip((open_severity + 0.5 * recent_incidents) / SEVERITY_REFERENCE, 0, 1)
+
+    scores = 100 * (
+        WEIGHTS["status"] * status_score
+        + WEIGHTS["age"] * age_score
+        + WEIGHTS["maintenance_gap"] * gap_score
+        + WEIGHTS["maintenance_cost"] * cost_score
+        + WEIGHTS["incidents"] * incident_score
+    )
+    return ids, np.round(scores, 2)
+
+
+def store_scores(ids, scores):
+    """
+    Ghi điểm vào Asset.risk_score: mỗi lô là một câu UPDATE ... FROM unnest(...).
+    """
+    table = connection.ops.quote_name(Asset._meta.db_table)
+    sql = (
+        f"UPDATE {table} AS a SET risk_score = s.score, risk_updated_at = %s "
+        "FROM unnest(%s::bigint[], %s::double precision[]) AS s(id, score) "
+        "WHERE a.id = s.id"
+    )
+    now = timezone.now()
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+            end = start + UPDATE_BATCH_SIZE
+            cursor.execute(sql, [now, ids[start:end].tolist(), scores[start:end].tolist()])
+
+
+def recompute_asset_health(asset_ids=None):
+    """
+    Tính lại và lưu điểm rủi ro (toàn bộ, hoặc chỉ các tài sản trong asset_ids).
+    Trả về số tài sản đã cập nhật.
+    """
+    ids, scores = compute_scores(asset_ids)
+    if len(ids):
+        store_scores(ids, scores)
+    return len(ids)
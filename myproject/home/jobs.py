@@ -0,0 +1,183 @@
+"""
+Hàng đợi công việc nền lưu trong PostgreSQL (không cần broker ngoài).
+
+- Công việc được đăng ký bằng decorator @task("tên") (xem home/tasks.py).
+- View gọi enqueue() rồi trả về ngay; `manage.py run_worker` lấy việc bằng
+  SELECT ... FOR UPDATE SKIP LOCKED nên nhiều luồng / tiến trình worker chạy
+  song song mà không lấy trùng việc. Muốn tăng thông lượng chỉ cần chạy thêm worker.
+- Việc lỗi được thử lại với độ trễ tăng dần, tối đa max_attempts lần.
+- Worker đang chạy việc cập nhật locked_at định kỳ (heartbeat); việc 'running'
+  không được cập nhật quá JOB_LOCK_TIMEOUT giây được coi là worker đã chết.
+- JOBS_RUN_EAGERLY = True thì enqueue() chạy việc ngay trong request (tiện khi phát triển).
+"""
+import contextlib
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+
+def task(name):
+    """
+    Đăng ký một hàm làm công việc nền. Tham số của hàm lấy từ Job.payload.
+    """
+    def decorator(func):
+        REGISTRY[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, priority=0, delay=None, max_attempts=3):
+    """
+    Đưa một công việc vào hàng đợi và trả về Job (None nếu chạy ngay do JOBS_RUN_EAGERLY).
+    - priority: số lớn hơn được chạy trước.
+    - delay: timedelta, chỉ chạy sau khoảng thời gian này.
+    """
+    if name not in REGISTRY:
+        raise ValueError(f"Chưa đăng ký công việc nền '{name}'")
+    payload = payload or {}
+
+    if getattr(settings, "JOBS_RUN_EAGERLY", False):
+        REGISTRY[name](**payload)
+        return None
+
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        priority=priority,
+        max_attempts=max_attempts,
+        run_after=timezone.now() + delay if delay else timezone.now(),
+    )
+
+
+def claim_job(worker_id):
+    """
+    Lấy một việc đang chờ có độ ưu tiên cao nhất và đánh dấu đang chạy.
+    SKIP LOCKED bỏ qua các dòng worker khác đang giữ khóa, nên không chờ nhau.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status="queued", run_after__lte=now)
+            .order_by("-priority", "run_after", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = "running"
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.locked_at = now
+        job.save(update_fields=["status", "attempts", "locked_by", "locked_at"])
+    return job
+
+
+def retry_delay(attempts):
+    """Độ trễ trước lần thử lại: JOB_RETRY_DELAY giây, nhân đôi sau mỗi lần lỗi."""
+    return timedelta(seconds=getattr(settings, "JOB_RETRY_DELAY", 30) * 2 ** (attempts - 1))
+
+
+def lock_timeout():
+    return timedelta(seconds=getattr(settings, "JOB_LOCK_TIMEOUT", 600))
+
+
+@contextlib.contextmanager
+def heartbeat(job):
+    """
+    Trong khi khối with chạy, một luồng phụ cập nhật job.locked_at sau mỗi
+    JOB_HEARTBEAT_INTERVAL giây (mặc định 1/4 JOB_LOCK_TIMEOUT), để việc chạy lâu
+    không bị requeue_stale_jobs() coi là treo và chạy lần thứ hai.
+    """
+    interval = getattr(settings, "JOB_HEARTBEAT_INTERVAL", None) or lock_timeout().total_seconds() / 4
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                Job.objects.filter(pk=job.pk, status="running", locked_by=job.locked_by).update(
+                    locked_at=timezone.now()
+                )
+        except Exception:
+            logger.exception("Không cập nhật được heartbeat của việc #%s", job.pk)
+        finally:
+            # Luồng phụ có kết nối CSDL riêng
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f"job-{job.pk}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job):
+    """
+    Chạy một việc đã được claim_job() lấy ra và lưu kết quả (xong / thử lại / thất bại).
+    """
+    func = REGISTRY.get(job.name)
+    try:
+        if func is None:
+            raise LookupError(f"Chưa đăng ký công việc nền '{job.name}'")
+        with heartbeat(job):
+            func(**job.payload)
+    except Exception:
+        logger.exception("Công việc nền %s #%s lỗi (lần %s)", job.name, job.pk, job.attempts)
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = "queued"
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+        else:
+            job.status = "failed"
+            job.finished_at = timezone.now()
+    else:
+        job.status = "done"
+        job.last_error = None
+        job.finished_at = timezone.now()
+
+    job.locked_by = None
+    job.locked_at = None
+    job.save(update_fields=[
+        "status", "last_error", "run_after", "finished_at", "locked_by", "locked_at",
+    ])
+    return job.status
+
+
+def requeue_stale_jobs():
+    """
+    Xử lý các việc 'running' không có heartbeat quá JOB_LOCK_TIMEOUT giây (worker
+    bị tắt đột ngột giữa chừng). Lần chạy dở đã được tính vào attempts khi
+    claim_job(), nên việc còn lượt thì đưa lại hàng đợi (có độ trễ như khi lỗi),
+    hết lượt thì đánh dấu thất bại, tránh việc làm sập worker bị thử lại mãi.
+    Trả về (số việc đưa lại hàng đợi, số việc thất bại).
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status="running", locked_at__lt=now - lock_timeout())
+    error = "Worker dừng giữa chừng (không có heartbeat quá JOB_LOCK_TIMEOUT giây)."
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status="failed", finished_at=now, locked_by=None, locked_at=None, last_error=error,
+    )
+    requeued = 0
+    with transaction.atomic():
+        for job in stale.filter(attempts__lt=F("max_attempts")).select_for_update(skip_locked=True):
+            job.status = "queued"
+            job.run_after = now + retry_delay(job.attempts)
+            job.locked_by = None
+            job.locked_at = None
+            job.last_error = error
+            job.save(update_fields=["status", "run_after", "locked_by", "locked_at", "last_error"])
+            requeued += 1
+    return requeued, failed
@@ -0,0 +1,69 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from home.models import AppUser
+
+# (url name, vai trò được vào trang)
+DASHBOARDS = [
+    ("facility_dashboard", ("facility_staff", "nhân viên csvc")),
+    ("facility_incident", ("facility_staff", "nhân viên csvc")),
+    ("teacher_dashboard", ("teacher", "giảng viên")),
+]
+TARGET_P95_MS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo thời gian render các dashboard (GET, đã đăng nhập) khi cache đã nóng: "
+        f"trung vị, p95 (mục tiêu < {TARGET_P95_MS} ms) và số truy vấn mỗi request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Số request đo cho mỗi trang (mặc định 200).")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("--requests phải từ 2 trở lên.")
+
+        app_users = list(AppUser.objects.select_related("role", "user").exclude(role=None))
+        for url_name, roles in DASHBOARDS:
+            app_user = next((u for u in app_users if u.role.name.lower() in roles), None)
+            if app_user is None:
+                self.stdout.write(self.style.WARNING(f"{url_name}: bỏ qua, không có người dùng vai trò {roles[0]}."))
+                continue
+
+            client = Client(HTTP_HOST="localhost")
+            client.force_login(app_user.user)
+            url = reverse(url_name)
+
+            # Request đầu tiên làm nóng cache (có thể chưa có đoạn template nào)
+            first, _queries = self.timed_get(client, url)
+            timings, queries = [], []
+            for _ in range(options["requests"]):
+                elapsed, count = self.timed_get(client, url)
+                timings.append(elapsed)
+                queries.append(count)
+
+            p95 = statistics.quantiles(timings, n=100, method="inclusive")[94]
+            style = self.style.SUCCESS if p95 < TARGET_P95_MS else self.style.ERROR
+            self.stdout.write(style(
+                f"{url_name} ({app_user.username}): lần đầu {first:6.1f} ms, "
+                f"trung vị {statistics.median(timings):6.1f} ms, p95 {p95:6.1f} ms, "
+                f"{statistics.median(queries):.0f} truy vấn/request"
+            ))
+
+    def timed_get(self, client, url):
+        """(thời gian ms, số truy vấn) của một GET; lỗi nếu không trả về 200."""
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            raise CommandError(f"GET {url} trả về {response.status_code}.")
+        return elapsed, len(captured.captured_queries)
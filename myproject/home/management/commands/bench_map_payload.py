@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.core.serializers import serialize
+from django.test import Client
+from django.urls import reverse
+
+from home.middleware import brotli
+from home.models import Building, Incident, Tree
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo số byte truyền qua mạng khi mở trang bản đồ: trước (GeoJSON đầy đủ "
+        "nhúng trong HTML, không nén) và sau (HTML + lớp JSON riêng, có nén / 304)."
+    )
+
+    def handle(self, *args, **options):
+        client = Client(HTTP_HOST="localhost")
+        map_url = reverse("map_view")
+        layer_urls = [
+            reverse("map_layer", args=[layer])
+            for layer in ("buildings", "trees", "incidents")
+        ]
+
+        rows = []
+
+        # Trước: serialize('geojson') đầy đủ độ chính xác, nhúng thẳng vào HTML
+        legacy_data = sum(
+            len(serialize("geojson", queryset, geometry_field="geom", fields=fields).encode())
+            for queryset, fields in (
+                (Building.objects.all(), ("name", "description")),
+                (Tree.objects.all(), ("code", "species", "health_status")),
+                (Incident.objects.all(), ("title", "status", "priority")),
+            )
+        )
+        shell = len(client.get(map_url, HTTP_ACCEPT_ENCODING="identity").content)
+        rows.append(("Trước: GeoJSON nhúng trong HTML, không nén", shell + legacy_data))
+
+        # Sau: HTML + 3 lớp JSON, theo từng kiểu nén
+        encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+        for encoding in encodings:
+            total = sum(
+                len(client.get(url, HTTP_ACCEPT_ENCODING=encoding).content)
+                for url in [map_url, *layer_urls]
+            )
+            rows.append((f"Sau: HTML + lớp JSON ({encoding})", total))
+
+        # Mở lại trang: các lớp JSON chưa đổi trả về 304 nhờ ETag
+        encoding = encodings[-1]
+        total = len(client.get(map_url, HTTP_ACCEPT_ENCODING=encoding).content)
+        for url in layer_urls:
+            etag = client.get(url, HTTP_ACCEPT_ENCODING=encoding).get("ETag", "")
+            response = client.get(url, HTTP_ACCEPT_ENCODING=encoding, HTTP_IF_NONE_MATCH=etag)
+            total += len(response.content)
+        rows.append((f"Mở lại trang ({encoding}, lớp JSON 304)", total))
+
+        baseline = rows[0][1] or 1
+        width = max(len(label) for label, _ in rows)
+        for label, size in rows:
+            self.stdout.write(f"{label:<{width}}  {size:>12,} byte  ({size / baseline:6.1%})")
@@ -0,0 +1,84 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from home import spatial_index
+
+
+class Command(BaseCommand):
+    help = (
+        "So sánh thời gian tra cứu điểm (gần nhất / trong bán kính) giữa chỉ mục "
+        "trong bộ nhớ và truy vấn PostGIS, trên các điểm ngẫu nhiên trong khuôn viên."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind", choices=sorted(spatial_index.MODELS), default="tree",
+            help="Loại đối tượng (mặc định tree).",
+        )
+        parser.add_argument("--queries", type=int, default=500, help="Số điểm truy vấn (mặc định 500).")
+        parser.add_argument("--radius", type=float, default=50, help="Bán kính (mét) cho truy vấn within.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        kind = options["kind"]
+        radius = options["radius"]
+
+        started = time.perf_counter()
+        index = spatial_index.build_index(kind)
+        build_ms = (time.perf_counter() - started) * 1000
+        if not len(index):
+            raise CommandError(f"Không có đối tượng '{kind}' nào có tọa độ.")
+        self.stdout.write(f"Xây chỉ mục {kind}: {len(index):,} điểm trong {build_ms:.1f} ms")
+
+        # Điểm truy vấn ngẫu nhiên trong khung bao của dữ liệu (nới thêm 10%)
+        snapshot = index._snapshot
+        (x_min, y_min), (x_max, y_max) = snapshot.xy.min(axis=0), snapshot.xy.max(axis=0)
+        pad_x, pad_y = (x_max - x_min) * 0.1, (y_max - y_min) * 0.1
+        rng = random.Random(options["seed"])
+        points = [
+            (rng.uniform(x_min - pad_x, x_max + pad_x) / index.kx,
+             rng.uniform(y_min - pad_y, y_max + pad_y) / index.ky)
+            for _ in range(options["queries"])
+        ]
+
+        rows = [
+            ("nearest - chỉ mục", *self.measure(lambda lon, lat: index.nearest(lon, lat), points)),
+            ("nearest - PostGIS", *self.measure(lambda lon, lat: spatial_index.nearest_db(kind, lon, lat), points)),
+            ("within - chỉ mục", *self.measure(lambda lon, lat: index.within(lon, lat, radius), points)),
+            ("within - PostGIS", *self.measure(lambda lon, lat: spatial_index.within_db(kind, lon, lat, radius), points)),
+        ]
+        width = max(len(label) for label, *_ in rows)
+        for label, mean_us, p95_us, _results in rows:
+            self.stdout.write(f"{label:<{width}}  trung bình {mean_us:10.1f} µs   p95 {p95_us:10.1f} µs")
+
+        # Độ khớp: khoảng cách tính theo mặt phẳng chiếu lệch rất nhỏ so với
+        # geography, nên chỉ coi là lệch khi hai kết quả khác nhau quá 0.5 m.
+        nearest_mismatch = sum(
+            1 for mine, theirs in zip(rows[0][3], rows[1][3])
+            if mine[0] != theirs[0] and abs(mine[1] - theirs[1]) > 0.5
+        )
+        within_mismatch = sum(
+            1 for mine, theirs in zip(rows[2][3], rows[3][3])
+            if {pk for pk, distance in mine if distance < radius - 0.5}
+            - {pk for pk, _distance in theirs}
+            or {pk for pk, distance in theirs if distance < radius - 0.5}
+            - {pk for pk, _distance in mine}
+        )
+        self.stdout.write(
+            f"Khác biệt so với PostGIS: nearest {nearest_mismatch}/{len(points)}, "
+            f"within {within_mismatch}/{len(points)}"
+        )
+
+    @staticmethod
+    def measure(lookup, points):
+        """(trung bình µs, p95 µs, danh sách kết quả) khi chạy lookup trên từng điểm."""
+        timings, results = [], []
+        for lon, lat in points:
+            started = time.perf_counter()
+            results.append(lookup(lon, lat))
+            timings.append((time.perf_counter() - started) * 1_000_000)
+        timings.sort()
+        return statistics.fmean(timings), timings[int(len(timings) * 0.95) - 1], results
@@ -0,0 +1,100 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Nạp URLconf như request đầu tiên (WSGI/ASGI chỉ nạp khi có request)
+LOAD_URLCONF = "from django.urls import get_resolver; get_resolver().url_patterns"
+
+WSGI = ["-c", f"from myproject.wsgi import application; {LOAD_URLCONF}"]
+ASGI = ["-c", f"from myproject.asgi import application; {LOAD_URLCONF}"]
+# Bỏ các biến này khỏi môi trường để Django tự dò thư viện như khi chưa cấu hình
+GDAL_ENV = ("GDAL_LIBRARY_PATH", "GEOS_LIBRARY_PATH")
+
+# (nhãn, DJANGO_SETTINGS_MODULE, tham số cho python, biến môi trường bỏ đi)
+# settings_lean chỉ rút ngắn lệnh quản trị / worker; tiến trình web (WSGI/ASGI)
+# chỉ nhanh hơn nhờ đặt sẵn GDAL_LIBRARY_PATH / GEOS_LIBRARY_PATH.
+SCENARIOS = [
+    ("manage.py check (settings)", "myproject.settings", ["manage.py", "check"], ()),
+    ("manage.py check (settings_lean)", "myproject.settings_lean", ["manage.py", "check"], ()),
+    ("WSGI + URLconf", "myproject.settings", WSGI, ()),
+    ("WSGI + URLconf, tự dò GDAL/GEOS", "myproject.settings", WSGI, GDAL_ENV),
+    ("ASGI + URLconf", "myproject.settings", ASGI, ()),
+    ("ASGI + URLconf, tự dò GDAL/GEOS", "myproject.settings", ASGI, GDAL_ENV),
+]
+
+re_importtime = re.compile(r"^import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)")
+
+
+def package_of(module):
+    """Nhóm module để tổng hợp: django.contrib.gis, django.db, home, numpy..."""
+    parts = module.split(".")
+    if parts[0] == "django":
+        return ".".join(parts[:3] if parts[1:2] == ["contrib"] else parts[:2])
+    return parts[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo thời gian khởi động nguội của lệnh quản trị và WSGI/ASGI (mỗi lần một "
+        "tiến trình Python mới), kèm tổng hợp `python -X importtime` theo gói."
+    )
+    # Chỉ chạy các tiến trình con; bản thân lệnh không cần system checks
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Số lần chạy mỗi kịch bản (mặc định 5).")
+        parser.add_argument("--top", type=int, default=8, help="Số gói import chậm nhất hiển thị (mặc định 8).")
+
+    def handle(self, *args, **options):
+        gdal_configured = bool(os.environ.get("GDAL_LIBRARY_PATH"))
+        if not gdal_configured:
+            self.stdout.write(self.style.WARNING(
+                "GDAL_LIBRARY_PATH chưa đặt trong biến môi trường: mỗi lần khởi động "
+                "Django sẽ tự dò thư viện GDAL/GEOS (bỏ qua các kịch bản so sánh)."
+            ))
+
+        for label, settings_module, arguments, dropped in SCENARIOS:
+            if dropped and not gdal_configured:
+                continue
+            env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+            for name in dropped:
+                env.pop(name, None)
+            timings = [self.run(arguments, env)[0] for _ in range(options["repeat"])]
+            # Lần chạy riêng với -X importtime (bản thân cờ này làm chậm thêm)
+            _elapsed, stderr = self.run(["-X", "importtime", *arguments], env)
+
+            imports = Counter()
+            for line in stderr.splitlines():
+                match = re_importtime.match(line)
+                if match:
+                    imports[package_of(match.group(2))] += int(match.group(1))
+
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(
+                f"  thời gian: trung vị {statistics.median(timings):7.1f} ms, "
+                f"nhỏ nhất {min(timings):7.1f} ms ({len(timings)} lần)"
+            )
+            self.stdout.write(
+                f"  import: {sum(imports.values()) / 1000:7.1f} ms, {len(imports)} gói; chậm nhất:"
+            )
+            for package, micros in imports.most_common(options["top"]):
+                self.stdout.write(f"    {micros / 1000:7.1f} ms  {package}")
+
+    def run(self, arguments, env):
+        """(thời gian ms, stderr) của một tiến trình Python mới chạy trong BASE_DIR."""
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, *arguments],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        elapsed = (time.perf_counter() - started) * 1000
+        if result.returncode != 0:
+            raise CommandError(f"Lệnh {' '.join(arguments)} lỗi:\n{result.stderr[-2000:]}")
+        return elapsed, result.stderr
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from home.health import recompute_asset_health
+
+
+class Command(BaseCommand):
+    help = "Tính lại điểm rủi ro cho toàn bộ tài sản (vector hóa bằng NumPy)."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = recompute_asset_health()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Đã cập nhật điểm rủi ro cho {count} tài sản trong {elapsed:.2f} giây."
+        ))
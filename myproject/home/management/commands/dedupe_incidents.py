@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from home.dedup import deduplicate_history, dedup_radius_m, dedup_window_hours
+
+
+class Command(BaseCommand):
+    help = "Gộp các sự cố trùng lặp trong lịch sử (cùng tài sản hoặc gần nhau trong một khoảng thời gian)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--radius", type=float, default=None,
+            help=f"Bán kính coi là trùng, tính bằng mét (mặc định {dedup_radius_m()}).",
+        )
+        parser.add_argument(
+            "--window-hours", type=int, default=None,
+            help=f"Khoảng thời gian coi là trùng, tính bằng giờ (mặc định {dedup_window_hours()}).",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Chỉ đếm số sự cố trùng, không cập nhật dữ liệu.",
+        )
+
+    def handle(self, *args, **options):
+        count = deduplicate_history(
+            radius_m=options["radius"],
+            window_hours=options["window_hours"],
+            dry_run=options["dry_run"],
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"Tìm thấy {count} sự cố trùng lặp (chưa cập nhật).")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Đã gộp {count} sự cố trùng lặp."))
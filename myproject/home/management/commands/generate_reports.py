@@ -0,0 +1,43 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from home.reports import REPORTS, generate_reports
+
+
+class Command(BaseCommand):
+    help = (
+        "Tạo báo cáo tuần (sự cố đang mở, chi phí bảo trì, cây nguy hiểm) và lưu "
+        "CSV / PDF thành phiên bản mới. Chạy từ cron ngoài giờ làm việc, ví dụ "
+        "'0 2 * * 1 python manage.py generate_reports'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--report", action="append", choices=sorted(REPORTS), dest="reports",
+            help="Chỉ tạo báo cáo này (lặp lại để chọn nhiều; mặc định tất cả).",
+        )
+        parser.add_argument(
+            "--period-end", default=None,
+            help="Ngày kết thúc kỳ (không tính), dạng YYYY-MM-DD; kỳ là 7 ngày trước đó. "
+                 "Mặc định tuần trọn vẹn gần nhất. Kỳ đã qua chỉ tạo được chi phí bảo trì.",
+        )
+        parser.add_argument("--no-pdf", action="store_true", help="Chỉ tạo CSV.")
+
+    def handle(self, *args, **options):
+        period_end = None
+        if options["period_end"]:
+            try:
+                period_end = date.fromisoformat(options["period_end"])
+            except ValueError:
+                raise CommandError("--period-end phải có dạng YYYY-MM-DD.")
+
+        try:
+            snapshots = generate_reports(options["reports"], period_end=period_end, pdf=not options["no_pdf"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        for snapshot in snapshots:
+            self.stdout.write(self.style.SUCCESS(
+                f"{snapshot}: {snapshot.row_count} dòng, {snapshot.csv_file.name}"
+                + (f", {snapshot.pdf_file.name}" if snapshot.pdf_file else "")
+            ))
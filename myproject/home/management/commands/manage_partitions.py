@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from home.partitioning import maintain_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Bảo trì phân vùng theo tháng của home_incident / home_maintenance: tạo trước "
+        "phân vùng cho các tháng tới và (với --archive) chuyển phân vùng cũ sang bảng lưu trữ."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead", type=int, default=None,
+            help="Số tháng tới cần tạo sẵn phân vùng (mặc định PARTITION_MONTHS_AHEAD).",
+        )
+        parser.add_argument(
+            "--archive", action="store_true",
+            help="Lưu trữ các phân vùng cũ hơn --hot-months tháng.",
+        )
+        parser.add_argument(
+            "--hot-months", type=int, default=None,
+            help="Số tháng gần nhất giữ trong bảng chính (mặc định PARTITION_HOT_MONTHS).",
+        )
+        parser.add_argument(
+            "--tablespace", default=None,
+            help="Tablespace cho phân vùng lưu trữ (mặc định PARTITION_ARCHIVE_TABLESPACE).",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Phân vùng chỉ hỗ trợ PostgreSQL.")
+
+        summary = maintain_partitions(
+            months_ahead=options["months_ahead"],
+            archive=options["archive"],
+            hot_months=options["hot_months"],
+            tablespace=options["tablespace"],
+        )
+        for table, (created, archived, skipped) in summary.items():
+            self.stdout.write(self.style.SUCCESS(
+                f"{table}: tạo {created} phân vùng mới, lưu trữ {len(archived)} phân vùng."
+            ))
+            for name in skipped:
+                self.stdout.write(f"  Bỏ qua {name}: còn sự cố chưa đóng.")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from home.models import Building
+
+
+class Command(BaseCommand):
+    help = (
+        "Tính lại các cột hình học giản lược của tòa nhà "
+        "(chạy sau khi đổi Building.SIMPLIFIED_GEOMS hoặc nhập dữ liệu bằng SQL)."
+    )
+
+    def handle(self, *args, **options):
+        count = Building.objects.refresh_simplified_geoms()
+        self.stdout.write(self.style.SUCCESS(f"Đã cập nhật hình học giản lược cho {count} tòa nhà."))
@@ -0,0 +1,87 @@
+import os
+import signal
+import socket
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from home.jobs import claim_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Chạy worker xử lý hàng đợi công việc nền. Có thể chạy nhiều tiến trình "
+        "worker song song (trên một hoặc nhiều máy) để tăng thông lượng."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency", type=int, default=None,
+            help="Số luồng xử lý trong tiến trình này (mặc định JOB_WORKER_CONCURRENCY).",
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=None,
+            help="Số giây chờ khi hàng đợi trống (mặc định JOB_POLL_INTERVAL).",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Xử lý hết các việc đang chờ rồi thoát.",
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options["concurrency"]
+        if concurrency is None:
+            concurrency = getattr(settings, "JOB_WORKER_CONCURRENCY", 1)
+        if concurrency < 1:
+            raise CommandError("--concurrency phải lớn hơn 0.")
+        poll_interval = options["poll_interval"]
+        if poll_interval is None:
+            poll_interval = getattr(settings, "JOB_POLL_INTERVAL", 1.0)
+        self.once = options["once"]
+        self.poll_interval = poll_interval
+        self.stop = threading.Event()
+
+        def shutdown(signum, frame):
+            self.stdout.write("Đang dừng worker sau khi xong các việc đang chạy...")
+            self.stop.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        requeued, failed = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Đã đưa lại {requeued} việc bị treo vào hàng đợi.")
+        if failed:
+            self.stdout.write(f"{failed} việc bị treo đã hết lượt thử, đánh dấu thất bại.")
+
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"Worker {prefix} chạy với {concurrency} luồng.")
+        threads = [
+            threading.Thread(target=self.work, args=(f"{prefix}:{index}",), daemon=True)
+            for index in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        # join có timeout để tín hiệu SIGINT/SIGTERM vẫn được xử lý ở luồng chính
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+
+    def work(self, worker_id):
+        """Vòng lặp của một luồng: lấy việc, chạy, lặp lại; nghỉ khi hàng đợi trống."""
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                job = claim_job(worker_id)
+                if job is None:
+                    if self.once:
+                        break
+                    self.stop.wait(self.poll_interval)
+                    continue
+                status = run_job(job)
+                self.stdout.write(f"[{worker_id}] {job.name} #{job.pk}: {status}")
+        finally:
+            # Mỗi luồng có kết nối CSDL riêng, cần đóng khi thoát
+            connection.close()
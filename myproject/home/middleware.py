@@ -0,0 +1,122 @@
+"""
+Middleware dùng chung của ứng dụng home.
+"""
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+from .routers import PIN_COOKIE, SAFE_METHODS, replica_aliases
+
+try:
+    import brotli
+except ImportError:  # brotli là tuỳ chọn, không có thì chỉ dùng gzip
+    brotli = None
+
+re_accepts_gzip = re.compile(r"\bgzip\b")
+re_accepts_brotli = re.compile(r"\bbr\b")
+
+# Chỉ nén các kiểu nội dung dạng văn bản (HTML, JSON/GeoJSON, CSS, JS...)
+COMPRESSIBLE_CONTENT_TYPES = (
+    "text/",
+    "application/json",
+    "application/geo+json",
+    "application/javascript",
+)
+# Brotli không có đệm ngẫu nhiên chống BREACH như gzip của Django, nên chỉ dùng
+# cho dữ liệu không chứa bí mật theo phiên (lớp bản đồ, API); HTML có token CSRF
+# vẫn nén gzip với max_random_bytes
+BROTLI_CONTENT_TYPES = (
+    "application/json",
+    "application/geo+json",
+    "application/javascript",
+)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Nén phản hồi HTML/JSON theo Accept-Encoding của trình duyệt: JSON/GeoJSON
+    dùng brotli nếu đã cài thư viện `brotli`, còn lại (kể cả HTML) dùng gzip.
+
+    Giống GZipMiddleware của Django nhưng có ngưỡng kích thước cấu hình được
+    (COMPRESSION_MIN_SIZE, mặc định 1024 byte) và hỗ trợ brotli.
+    File tĩnh do WhiteNoise phục vụ đã được nén sẵn nên không đi qua đây.
+    """
+
+    max_random_bytes = 100  # giảm rủi ro BREACH cho gzip, giống GZipMiddleware
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return response
+        content_type = response.get("Content-Type", "")
+        if not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES):
+            return response
+        if not response.streaming and len(response.content) < self._min_size():
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+
+        if response.streaming:
+            # Phản hồi dạng stream chỉ nén gzip từng đoạn
+            if not re_accepts_gzip.search(accept_encoding):
+                return response
+            response.streaming_content = compress_sequence(
+                response.streaming_content, max_random_bytes=self.max_random_bytes
+            )
+            del response.headers["Content-Length"]
+            encoding = "gzip"
+        else:
+            if (
+                brotli is not None
+                and content_type.startswith(BROTLI_CONTENT_TYPES)
+                and re_accepts_brotli.search(accept_encoding)
+            ):
+                compressed = brotli.compress(
+                    response.content,
+                    quality=getattr(settings, "COMPRESSION_BROTLI_QUALITY", 5),
+                )
+                encoding = "br"
+            elif re_accepts_gzip.search(accept_encoding):
+                compressed = compress_string(
+                    response.content, max_random_bytes=self.max_random_bytes
+                )
+                encoding = "gzip"
+            else:
+                return response
+
+            # Nếu nén không giúp giảm kích thước thì giữ nguyên
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(response.content))
+
+        # ETag của nội dung gốc không còn đúng từng byte nên chuyển thành weak ETag
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    @staticmethod
+    def _min_size():
+        return getattr(settings, "COMPRESSION_MIN_SIZE", 1024)
+
+
+class ReplicaPinningMiddleware(MiddlewareMixin):
+    """
+    Sau request ghi (POST...), ghim người dùng vào CSDL primary trong
+    REPLICA_PIN_SECONDS giây để đọc được ngay dữ liệu vừa ghi (xem home/routers.py).
+    """
+
+    def process_response(self, request, response):
+        if request.method not in SAFE_METHODS and replica_aliases():
+            response.set_cookie(
+                PIN_COOKIE, "1",
+                max_age=getattr(settings, "REPLICA_PIN_SECONDS", 5),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,30 @@
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='building',
+            name='geom_low',
+            field=django.contrib.gis.db.models.fields.PolygonField(blank=True, editable=False, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='building',
+            name='geom_mid',
+            field=django.contrib.gis.db.models.fields.PolygonField(blank=True, editable=False, null=True, srid=4326),
+        ),
+        migrations.RunSQL(
+            sql=(
+                "UPDATE home_building SET "
+                "geom_low = ST_SimplifyPreserveTopology(geom, 0.00004), "
+                "geom_mid = ST_SimplifyPreserveTopology(geom, 0.00001);"
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
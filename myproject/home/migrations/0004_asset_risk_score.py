@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0003_incident_duplicate_of'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='risk_score',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='risk_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,180 @@
+from datetime import date, datetime, timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Bản chép tại thời điểm viết migration (không import home.partitioning) để sửa
+# đổi sau này của module đó không làm đổi những gì migration này đã làm.
+
+# bảng -> (cột phân vùng, kiểu cột)
+PARTITIONED_TABLES = {
+    'home_incident': ('reported_at', 'timestamptz'),
+    'home_maintenance': ('maintenance_date', 'date'),
+}
+MONTHS_AHEAD = 3
+
+
+def _month_start(value):
+    if isinstance(value, datetime):
+        value = value.astimezone(timezone.utc).date()
+    return value.replace(day=1)
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(table, month):
+    _column, column_type = PARTITIONED_TABLES[table]
+    if column_type == 'timestamptz':
+        return f"'{month.isoformat()} 00:00:00+00'"
+    return f"'{month.isoformat()}'"
+
+
+def _range_sql(table, month):
+    return f'FROM ({_bound(table, month)}) TO ({_bound(table, _add_months(month, 1))})'
+
+
+def _index_definitions(cursor, table):
+    cursor.execute(
+        'SELECT pg_get_indexdef(indexrelid) FROM pg_index '
+        'WHERE indrelid = %s::regclass AND NOT indisprimary',
+        [table],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _foreign_key_definitions(cursor, table):
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _check_no_incoming_foreign_keys(cursor, table):
+    cursor.execute(
+        "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+        "WHERE confrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    incoming = cursor.fetchall()
+    if incoming:
+        raise RuntimeError(f'Không thể phân vùng {table}: còn khoá ngoại trỏ vào bảng ({incoming})')
+
+
+def _partition_table(cursor, table):
+    """
+    Chuyển bảng thường thành bảng phân vùng theo tháng (phân vùng default, các
+    tháng từ dòng cũ nhất đến MONTHS_AHEAD tháng tới), giữ nguyên dữ liệu, chỉ
+    mục và khoá ngoại đi ra. Bảng còn trống nên các phân vùng tháng được tạo
+    trước khi nạp dữ liệu.
+    """
+    column, _column_type = PARTITIONED_TABLES[table]
+    legacy = f'{table}_legacy'
+    sequence = f'{table}_id_seq'
+
+    _check_no_incoming_foreign_keys(cursor, table)
+    indexes = _index_definitions(cursor, table)
+    foreign_keys = _foreign_key_definitions(cursor, table)
+
+    cursor.execute(f'SELECT COALESCE(max(id), 0), min({column}) FROM {table}')
+    max_id, oldest = cursor.fetchone()
+
+    cursor.execute(f'ALTER TABLE {table} ALTER COLUMN id DROP IDENTITY IF EXISTS')
+    cursor.execute(f'ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT')
+    cursor.execute(f'DROP SEQUENCE IF EXISTS {sequence}')
+    cursor.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+
+    cursor.execute(
+        f'CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) '
+        f'PARTITION BY RANGE ({column})'
+    )
+    cursor.execute(f'CREATE SEQUENCE {sequence} AS bigint OWNED BY {table}.id')
+    cursor.execute('SELECT setval(%s, %s, %s)', [sequence, max(max_id, 1), max_id > 0])
+    cursor.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+
+    cursor.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+    this_month = _month_start(datetime.now(timezone.utc))
+    month = _month_start(oldest) if oldest else this_month
+    while month <= _add_months(this_month, MONTHS_AHEAD):
+        cursor.execute(
+            f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} FOR VALUES {_range_sql(table, month)}"
+        )
+        month = _add_months(month, 1)
+
+    cursor.execute(f'INSERT INTO {table} SELECT * FROM {legacy}')
+    cursor.execute(f'DROP TABLE {legacy}')
+
+    cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {column})')
+    for definition in indexes:
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+
+
+def _unpartition_table(cursor, table):
+    """Gộp các phân vùng nóng về một bảng thường (<bảng>_archive được giữ nguyên)."""
+    partitioned = f'{table}_partitioned'
+    sequence = f'{table}_id_seq'
+
+    indexes = _index_definitions(cursor, table)
+    foreign_keys = _foreign_key_definitions(cursor, table)
+
+    cursor.execute(f'ALTER TABLE {table} RENAME TO {partitioned}')
+    cursor.execute(
+        f'CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)'
+    )
+    cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {table}.id')
+    cursor.execute(f'INSERT INTO {table} SELECT * FROM {partitioned}')
+    cursor.execute(f'DROP TABLE {partitioned}')
+
+    cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)')
+    for definition in indexes:
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+
+
+def partition_history_tables(apps, schema_editor):
+    # Phân vùng khai báo chỉ có trên PostgreSQL; CSDL khác giữ bảng thường
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            _partition_table(cursor, table)
+
+
+def unpartition_history_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            _unpartition_table(cursor, table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0005_job'),
+    ]
+
+    operations = [
+        # Bảng phân vùng không thể là đích của khoá ngoại (khoá chính gồm cả reported_at)
+        migrations.AlterField(
+            model_name='incident',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='home.incident'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['reported_at'], name='incident_reported_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenance',
+            index=models.Index(fields=['staff', 'maintenance_date'], name='maintenance_staff_date_idx'),
+        ),
+        migrations.RunPython(partition_history_tables, unpartition_history_tables),
+    ]
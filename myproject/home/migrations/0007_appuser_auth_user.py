@@ -0,0 +1,83 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.db import migrations, models
+
+
+def _hashed(password):
+    # Giống AppUser.save() cũ: chuỗi chưa được băm thì băm trước khi lưu
+    try:
+        identify_hasher(password)
+    except ValueError:
+        return make_password(password)
+    return password
+
+
+def _check_constraints_now(schema_editor):
+    # Khoá ngoại mới là DEFERRABLE INITIALLY DEFERRED: kiểm tra ngay để không còn
+    # trigger chờ khi ALTER TABLE ở các bước sau trong cùng giao dịch (PostgreSQL)
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+def link_auth_users(apps, schema_editor):
+    """Gắn mỗi AppUser với tài khoản auth_user cùng tên (tạo mới nếu chưa có)."""
+    AppUser = apps.get_model('home', 'AppUser')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    for app_user in AppUser.objects.select_related('role'):
+        user = User.objects.filter(username=app_user.username).first()
+        if user is None:
+            user = User(username=app_user.username, is_active=True)
+        if not user.password and app_user.password:
+            user.password = _hashed(app_user.password)
+        if app_user.role and app_user.role.name.lower() == 'admin':
+            user.is_staff = True
+        user.save()
+        app_user.user = user
+        app_user.save(update_fields=['user'])
+    _check_constraints_now(schema_editor)
+
+
+def restore_app_user_credentials(apps, schema_editor):
+    AppUser = apps.get_model('home', 'AppUser')
+    for app_user in AppUser.objects.select_related('user'):
+        app_user.username = app_user.user.username
+        app_user.password = app_user.user.password
+        app_user.save(update_fields=['username', 'password'])
+    _check_constraints_now(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0006_partition_history_tables'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appuser',
+            name='user',
+            field=models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='app_user', to=settings.AUTH_USER_MODEL),
+        ),
+        # Bỏ unique trước để bước ngược lại có thể thêm lại cột rồi mới điền dữ liệu
+        migrations.AlterField(
+            model_name='appuser',
+            name='username',
+            field=models.CharField(max_length=150),
+        ),
+        migrations.RunPython(link_auth_users, restore_app_user_credentials),
+        migrations.AlterField(
+            model_name='appuser',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='app_user', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RemoveField(
+            model_name='appuser',
+            name='username',
+        ),
+        migrations.RemoveField(
+            model_name='appuser',
+            name='password',
+        ),
+    ]
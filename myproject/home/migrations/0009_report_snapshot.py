@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0008_equipment_type_status_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_type', models.CharField(choices=[('open_incidents', 'Open incidents by building and priority'), ('maintenance_spend', 'Maintenance spend'), ('dangerous_trees', 'Dangerous trees')], max_length=50)),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField()),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('generated_at', models.DateTimeField(auto_now_add=True)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('summary', models.JSONField(blank=True, default=dict)),
+                ('csv_file', models.FileField(upload_to='reports/%Y/%m/')),
+                ('pdf_file', models.FileField(blank=True, upload_to='reports/%Y/%m/')),
+            ],
+            options={
+                'ordering': ['-period_start', 'report_type', '-version'],
+                'constraints': [models.UniqueConstraint(fields=('report_type', 'period_start', 'version'), name='report_snapshot_version_uniq')],
+            },
+        ),
+    ]
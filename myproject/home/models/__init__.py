@@ -6,3 +6,5 @@ from .equipment import *
 from .asset import *
 from .incident import *
 from .maintenance import *
+from .job import *
+from .report import *
@@ -16,6 +16,9 @@ class Asset(models.Model):
         Tree, on_delete=models.CASCADE, null=True, blank=True
     )
     asset_type = models.CharField(max_length=20, choices=ASSET_TYPES)
+    # Điểm rủi ro 0–100 do home/health.py tính (càng cao càng cần ưu tiên xử lý)
+    risk_score = models.FloatField(null=True, blank=True, editable=False, db_index=True)
+    risk_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     def clean(self):
         if (self.equipment and self.tree) or (not self.equipment and not self.tree):
@@ -1,10 +1,57 @@
 from django.contrib.gis.db import models
+from django.db.models.functions import Coalesce
+
+from ..geo import SimplifyPreserveTopology
+
+
+class BuildingQuerySet(models.QuerySet):
+    def refresh_simplified_geoms(self):
+        """
+        Tính lại các cột hình học giản lược bằng một câu UPDATE duy nhất
+        (ST_SimplifyPreserveTopology chạy trong PostGIS).
+        """
+        return self.update(**{
+            field: SimplifyPreserveTopology("geom", tolerance)
+            for field, _max_zoom, tolerance in Building.SIMPLIFIED_GEOMS
+        })
 
 
 class Building(models.Model):
+    # Hình học giản lược theo mức zoom: (tên cột, zoom tối đa dùng cột này, sai số tính bằng độ)
+    # 0.00001° ~ 1.1 m, xấp xỉ một nửa pixel ở zoom 17.
+    SIMPLIFIED_GEOMS = [
+        ("geom_low", 15, 0.00004),
+        ("geom_mid", 17, 0.00001),
+    ]
+
     name = models.TextField()
     description = models.TextField(null=True, blank=True)
     geom = models.PolygonField(srid=4326)
+    geom_low = models.PolygonField(srid=4326, null=True, blank=True, editable=False)
+    geom_mid = models.PolygonField(srid=4326, null=True, blank=True, editable=False)
+
+    objects = BuildingQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        """
+        Sau khi lưu, cập nhật lại các cột hình học giản lược nếu geom có thể đã thay đổi.
+        """
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "geom" in update_fields:
+            Building.objects.filter(pk=self.pk).refresh_simplified_geoms()
+
+    @classmethod
+    def geometry_for_zoom(cls, zoom):
+        """
+        Trả về cột (hoặc biểu thức) hình học phù hợp với mức zoom của bản đồ.
+        Zoom lớn hoặc không xác định thì dùng hình học gốc.
+        """
+        if zoom is not None:
+            for field, max_zoom, _tolerance in cls.SIMPLIFIED_GEOMS:
+                if zoom <= max_zoom:
+                    return Coalesce(field, "geom")
+        return "geom"
 
     def __str__(self):
         return self.name
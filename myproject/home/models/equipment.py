@@ -18,5 +18,11 @@ class Equipment(models.Model):
     room = models.ForeignKey(Room, on_delete=models.SET_NULL, null=True)
     geom = models.PointField(srid=4326)
 
+    class Meta:
+        indexes = [
+            # Lọc theo loại + tình trạng trong phân tích vùng phục vụ (home/analysis.py)
+            models.Index(fields=['equipment_type', 'status'], name='equipment_type_status_idx'),
+        ]
+
     def __str__(self):
         return self.code
@@ -36,6 +36,22 @@ class Incident(models.Model):
     asset = models.ForeignKey(Asset, on_delete=models.CASCADE)
     incident_type = models.ForeignKey(IncidentType, on_delete=models.SET_NULL, null=True)
     geom = models.PointField(srid=4326)
+    # Báo cáo trùng lặp được gộp vào sự cố gốc (xem home/dedup.py).
+    # Không tạo ràng buộc khoá ngoại trong CSDL vì bảng được phân vùng theo tháng
+    # (home/partitioning.py); SET_NULL vẫn do Django thực hiện.
+    duplicate_of = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='duplicates',
+        db_constraint=False,
+    )
+
+    class Meta:
+        indexes = [
+            # Tra cứu sự cố đang mở của cùng tài sản trong khoảng thời gian gần đây
+            models.Index(fields=['asset', 'status', 'reported_at'], name='incident_asset_status_idx'),
+            models.Index(fields=['status', 'reported_at'], name='incident_status_reported_idx'),
+            # Sắp xếp theo thời gian chỉ đọc các phân vùng tháng gần nhất
+            models.Index(fields=['reported_at'], name='incident_reported_idx'),
+        ]
 
     def __str__(self):
         return self.title
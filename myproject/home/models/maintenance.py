@@ -18,5 +18,11 @@ class Maintenance(models.Model):
     cost = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     note = models.TextField(null=True, blank=True)
 
+    class Meta:
+        # Bảng được phân vùng theo tháng của maintenance_date (home/partitioning.py)
+        indexes = [
+            models.Index(fields=['staff', 'maintenance_date'], name='maintenance_staff_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.maintenance_type} - {self.asset_id}"
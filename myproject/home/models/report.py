@@ -0,0 +1,37 @@
+from django.db import models
+
+
+class ReportSnapshot(models.Model):
+    """
+    Một lần tạo báo cáo định kỳ (xem home/reports.py). Tạo lại cùng kỳ thì sinh
+    phiên bản mới, các phiên bản cũ được giữ nguyên để đối chiếu.
+    """
+    REPORT_TYPES = [
+        ('open_incidents', 'Open incidents by building and priority'),
+        ('maintenance_spend', 'Maintenance spend'),
+        ('dangerous_trees', 'Dangerous trees'),
+    ]
+
+    report_type = models.CharField(max_length=50, choices=REPORT_TYPES)
+    # Kỳ báo cáo [period_start, period_end)
+    period_start = models.DateField()
+    period_end = models.DateField()
+    version = models.PositiveIntegerField(default=1)
+    generated_at = models.DateTimeField(auto_now_add=True)
+    row_count = models.PositiveIntegerField(default=0)
+    # Số liệu tổng hợp hiển thị nhanh (tổng số sự cố, tổng chi phí...)
+    summary = models.JSONField(default=dict, blank=True)
+    csv_file = models.FileField(upload_to='reports/%Y/%m/')
+    pdf_file = models.FileField(upload_to='reports/%Y/%m/', blank=True)
+
+    class Meta:
+        ordering = ['-period_start', 'report_type', '-version']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['report_type', 'period_start', 'version'],
+                name='report_snapshot_version_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} {self.period_start:%d/%m/%Y} v{self.version}"
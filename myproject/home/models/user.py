@@ -1,5 +1,5 @@
+from django.conf import settings
 from django.db import models
-from django.contrib.auth.hashers import make_password
 
 
 class Role(models.Model):
@@ -10,25 +10,18 @@ class Role(models.Model):
 
 
 class AppUser(models.Model):
-    username = models.CharField(max_length=150, unique=True)
-    password = models.TextField()
+    """
+    Hồ sơ người dùng của ứng dụng (vai trò), gắn 1-1 với tài khoản đăng nhập
+    của Django. Tên đăng nhập và mật khẩu chỉ lưu ở bảng auth_user.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='app_user'
+    )
     role = models.ForeignKey(Role, on_delete=models.SET_NULL, null=True)
 
-    def save(self, *args, **kwargs):
-        """
-        Tự động mã hóa mật khẩu nếu đang ở dạng plain-text.
-
-        - Nếu mật khẩu đã được Django hash (bắt đầu bằng tên thuật toán như 'pbkdf2_', 'argon2', 'bcrypt')
-          thì giữ nguyên.
-        - Nếu là chuỗi plain-text thì dùng make_password để mã hóa trước khi lưu.
-        """
-        if self.password and not (
-            self.password.startswith("pbkdf2_")
-            or self.password.startswith("argon2")
-            or self.password.startswith("bcrypt")
-        ):
-            self.password = make_password(self.password)
-        super().save(*args, **kwargs)
+    @property
+    def username(self):
+        return self.user.username
 
     def __str__(self):
         return self.username
@@ -0,0 +1,228 @@
+"""
+Phân vùng theo tháng (PostgreSQL declarative range partitioning) cho các bảng
+lịch sử tăng không giới hạn:
+
+- home_incident, theo reported_at (timestamptz, ranh giới tháng tính theo UTC)
+- home_maintenance, theo maintenance_date (date)
+
+Mỗi tháng là một phân vùng <bảng>_pYYYY_MM, kèm phân vùng <bảng>_default cho
+dữ liệu ngoài các tháng đã tạo. `manage.py manage_partitions` tạo trước các
+tháng sắp tới và chuyển phân vùng cũ sang bảng lưu trữ <bảng>_archive, nên
+truy vấn qua model chỉ chạm vào các phân vùng "nóng".
+
+Phân vùng lưu trữ là bản chép lại (cột văn bản nén lz4, không có khoá ngoại đi
+ra): xoá Asset / AppUser / IncidentType không bị chặn bởi lịch sử đã lưu trữ,
+đổi lại các dòng lưu trữ có thể trỏ tới đối tượng không còn tồn tại.
+
+Dữ liệu đã lưu trữ KHÔNG còn đọc được qua model Incident / Maintenance (chỉ
+bằng SQL trên <bảng>_archive):
+- báo cáo theo kỳ từ chối các tháng đã lưu trữ (archived_months(), home/reports.py);
+- tổng chi phí bảo trì trong home/health.py chỉ gồm các tháng còn nóng;
+- Incident.duplicate_of có thể trỏ tới sự cố đã lưu trữ, truy cập quan hệ đó
+  báo DoesNotExist (nên dùng duplicate_of_id).
+
+Việc chuyển bảng thường sang bảng phân vùng nằm trọn trong migration 0006
+(chép riêng SQL để lịch sử migration không đổi theo module này).
+
+Khoá chính của bảng phân vùng phải chứa cột phân vùng nên trong CSDL là
+(id, <cột>); phía Django vẫn coi id là khoá chính (id lấy từ sequence nên vẫn duy nhất).
+Vì vậy không bảng nào được có khoá ngoại CSDL trỏ vào các bảng này.
+"""
+import re
+from datetime import date, datetime, timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+
+# bảng -> (cột phân vùng, kiểu cột)
+PARTITIONED_TABLES = {
+    "home_incident": ("reported_at", "timestamptz"),
+    "home_maintenance": ("maintenance_date", "date"),
+}
+
+# Phân vùng có dòng thoả điều kiện này thì chưa được lưu trữ (sự cố chưa đóng)
+ARCHIVE_BLOCKERS = {
+    "home_incident": "status <> 'closed'",
+}
+
+# Cột văn bản được nén lz4 khi chép sang phân vùng lưu trữ (PostgreSQL 14+)
+ARCHIVE_COMPRESSED_COLUMNS = {
+    "home_incident": ("title", "description"),
+    "home_maintenance": ("note",),
+}
+
+PARTITION_NAME_RE = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def month_start(value):
+    if isinstance(value, datetime):
+        value = value.astimezone(timezone.utc).date()
+    return value.replace(day=1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y_%m}"
+
+
+def _bound(table, month):
+    _column, column_type = PARTITIONED_TABLES[table]
+    if column_type == "timestamptz":
+        return f"'{month.isoformat()} 00:00:00+00'"
+    return f"'{month.isoformat()}'"
+
+
+def _range_sql(table, month):
+    return f"FROM ({_bound(table, month)}) TO ({_bound(table, add_months(month, 1))})"
+
+
+def _exists(cursor, relation):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [relation])
+    return cursor.fetchone()[0]
+
+
+def create_partition(cursor, table, month):
+    """
+    Tạo phân vùng cho một tháng nếu chưa có. Nếu phân vùng default đang giữ
+    dòng thuộc tháng này thì chuyển các dòng đó sang phân vùng mới.
+    Trả về True nếu vừa tạo.
+    """
+    name = partition_name(table, month)
+    if _exists(cursor, name):
+        return False
+
+    column, _column_type = PARTITIONED_TABLES[table]
+    default = f"{table}_default"
+    start, end = _bound(table, month), _bound(table, add_months(month, 1))
+    cursor.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {column} >= {start} AND {column} < {end})"
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES {_range_sql(table, month)}")
+        return True
+
+    cursor.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {default} WHERE {column} >= {start} AND {column} < {end} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    )
+    cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES {_range_sql(table, month)}")
+    return True
+
+
+def ensure_partitions(cursor, table, first_month, last_month):
+    """Tạo đủ phân vùng từ first_month đến last_month (tính cả hai đầu). Trả về số phân vùng mới."""
+    created = 0
+    month = month_start(first_month)
+    while month <= last_month:
+        created += create_partition(cursor, table, month)
+        month = add_months(month, 1)
+    return created
+
+
+def list_partitions(cursor, table):
+    """[(tên phân vùng, tháng)] của bảng, không gồm phân vùng default."""
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = %s::regclass ORDER BY c.relname",
+        [table],
+    )
+    partitions = []
+    for (name,) in cursor.fetchall():
+        match = PARTITION_NAME_RE.search(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return partitions
+
+
+def archived_months(table):
+    """Tập các tháng (ngày 1) của bảng đã chuyển sang <bảng>_archive."""
+    if connection.vendor != "postgresql":
+        return set()
+    with connection.cursor() as cursor:
+        archive = f"{table}_archive"
+        if not _exists(cursor, archive):
+            return set()
+        return {month for _name, month in list_partitions(cursor, archive)}
+
+
+def _rewrite_for_archive(cursor, table, name, tablespace=None):
+    """
+    Chép phân vùng đã DETACH sang bảng mới cùng tên: cột trong
+    ARCHIVE_COMPRESSED_COLUMNS nén lz4 (SET COMPRESSION chỉ áp dụng cho dữ liệu
+    ghi sau đó nên phải ghi lại toàn bộ), không mang khoá ngoại và DEFAULT
+    (nextval của bảng nóng), đặt trên tablespace lưu trữ nếu có.
+    """
+    rewritten = f"{name}_rewrite"
+    cursor.execute(
+        f"CREATE TABLE {rewritten} (LIKE {table} INCLUDING CONSTRAINTS)"
+        + (f" TABLESPACE {tablespace}" if tablespace else "")
+    )
+    for compressed_column in ARCHIVE_COMPRESSED_COLUMNS.get(table, ()):
+        cursor.execute(f"ALTER TABLE {rewritten} ALTER COLUMN {compressed_column} SET COMPRESSION lz4")
+    cursor.execute(f"INSERT INTO {rewritten} SELECT * FROM {name}")
+    cursor.execute(f"DROP TABLE {name}")
+    cursor.execute(f"ALTER TABLE {rewritten} RENAME TO {name}")
+
+
+def archive_partitions(cursor, table, before_month, tablespace=None):
+    """
+    Chuyển các phân vùng của các tháng trước before_month sang bảng lưu trữ
+    <bảng>_archive: DETACH khỏi bảng nóng, chép lại (xem _rewrite_for_archive)
+    rồi ATTACH vào bảng lưu trữ.
+
+    Trả về (danh sách phân vùng đã lưu trữ, danh sách phân vùng bị bỏ qua).
+    """
+    column, _column_type = PARTITIONED_TABLES[table]
+    archive = f"{table}_archive"
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {archive} (LIKE {table}) PARTITION BY RANGE ({column})")
+
+    archived, skipped = [], []
+    for name, month in list_partitions(cursor, table):
+        if month >= before_month:
+            continue
+        blocker = ARCHIVE_BLOCKERS.get(table)
+        if blocker:
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {name} WHERE {blocker})")
+            if cursor.fetchone()[0]:
+                skipped.append(name)
+                continue
+
+        cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+        _rewrite_for_archive(cursor, table, name, tablespace)
+        cursor.execute(f"ALTER TABLE {archive} ATTACH PARTITION {name} FOR VALUES {_range_sql(table, month)}")
+        archived.append(name)
+    return archived, skipped
+
+
+def maintain_partitions(months_ahead=None, archive=False, hot_months=None, tablespace=None):
+    """
+    Việc định kỳ: tạo trước phân vùng cho months_ahead tháng tới và (nếu archive)
+    lưu trữ các phân vùng cũ hơn hot_months tháng. Trả về
+    {bảng: (số phân vùng mới, danh sách đã lưu trữ, danh sách bị bỏ qua)}.
+    """
+    if connection.vendor != "postgresql":
+        return {}
+    if months_ahead is None:
+        months_ahead = getattr(settings, "PARTITION_MONTHS_AHEAD", 3)
+    if hot_months is None:
+        hot_months = getattr(settings, "PARTITION_HOT_MONTHS", 12)
+    if tablespace is None:
+        tablespace = getattr(settings, "PARTITION_ARCHIVE_TABLESPACE", None)
+
+    this_month = month_start(datetime.now(timezone.utc))
+    summary = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            created = ensure_partitions(cursor, table, this_month, add_months(this_month, months_ahead))
+            archived, skipped = [], []
+            if archive:
+                archived, skipped = archive_partitions(
+                    cursor, table, add_months(this_month, -hot_months), tablespace
+                )
+            summary[table] = (created, archived, skipped)
+    return summary
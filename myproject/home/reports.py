@@ -0,0 +1,308 @@
+"""
+Báo cáo định kỳ cho ban quản lý: sự cố đang mở theo tòa nhà / mức độ, chi phí
+bảo trì trong kỳ và danh sách cây nguy hiểm.
+
+- Dữ liệu được tính theo lịch (`manage.py generate_reports` chạy từ cron mỗi
+  tuần, hoặc việc nền "generate_reports") ngoài giờ làm việc, đọc từ bản sao
+  nếu có (home/routers.py), rồi lưu thành ReportSnapshot có đánh số phiên bản.
+- CSV được ghi dần từ .iterator() nên không nạp toàn bộ kết quả vào bộ nhớ;
+  PDF được vẽ lại từ tệp CSV đó từng dòng lên canvas reportlab.
+- Tải về (views.report_download) chỉ trả tệp đã lưu, không truy vấn dữ liệu gốc.
+- Báo cáo chụp trạng thái hiện tại (POINT_IN_TIME_REPORTS) không tạo lại được
+  cho kỳ đã qua, báo cáo theo kỳ không tạo được cho tháng đã lưu trữ
+  (refusal_reason); PDF ghi rõ thời điểm tạo.
+"""
+import csv
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Case, Count, IntegerField, Max, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .dedup import OPEN_STATUSES
+from .partitioning import archived_months, month_start
+from .models import Incident, Maintenance, ReportSnapshot, Tree
+from .routers import replica_reads
+
+# Tài sản là cây không thuộc tòa nhà nào
+OUTDOOR_LABEL = "Ngoài trời"
+PRIORITY_ORDER = Case(
+    When(priority="high", then=Value(0)),
+    When(priority="medium", then=Value(1)),
+    default=Value(2),
+    output_field=IntegerField(),
+)
+CHUNK_SIZE = 2000
+
+# Báo cáo theo trạng thái lúc tạo, không lọc theo kỳ: tạo lại cho kỳ cũ sẽ gắn
+# dữ liệu hôm nay cho kỳ đó
+POINT_IN_TIME_REPORTS = {"open_incidents", "dangerous_trees"}
+# Báo cáo theo kỳ -> bảng nguồn được phân vùng và lưu trữ (home/partitioning.py)
+ARCHIVED_SOURCES = {"maintenance_spend": "home_maintenance"}
+
+PDF_FONT_NAME = "ReportFont"
+# Font mặc định có đủ dấu tiếng Việt, đi kèm mã nguồn (giấy phép trong home/fonts/LICENSE)
+DEFAULT_PDF_FONT = Path(__file__).resolve().parent / "fonts" / "DejaVuSans.ttf"
+PDF_MARGIN = 36          # point (0.5 inch)
+PDF_LINE_HEIGHT = 14
+
+
+def weekly_period(today=None):
+    """Tuần trọn vẹn gần nhất: (thứ Hai tuần trước, thứ Hai tuần này)."""
+    today = today or timezone.localdate()
+    period_end = today - timedelta(days=today.weekday())
+    return period_end - timedelta(days=7), period_end
+
+
+def refusal_reason(report_type, period_end, today=None):
+    """
+    Lý do không tạo được báo cáo cho kỳ 7 ngày kết thúc trước period_end, hoặc
+    None: báo cáo chụp trạng thái hiện tại mà kỳ đã qua, hoặc kỳ chạm tháng mà
+    dữ liệu nguồn đã lưu trữ (không còn đọc được qua model, báo cáo sẽ ra 0).
+    """
+    period_start = period_end - timedelta(days=7)
+    period = f"{period_start:%d/%m/%Y} – {period_end - timedelta(days=1):%d/%m/%Y}"
+    if report_type in POINT_IN_TIME_REPORTS and period_end < weekly_period(today)[1]:
+        return f"Báo cáo {report_type} lấy trạng thái hiện tại, không tạo lại được cho kỳ đã qua ({period})."
+    table = ARCHIVED_SOURCES.get(report_type)
+    if table:
+        archived = archived_months(table)
+        if month_start(period_start) in archived or month_start(period_end - timedelta(days=1)) in archived:
+            return f"Dữ liệu của kỳ {period} đã được lưu trữ ({table}_archive), không tạo lại được {report_type}."
+    return None
+
+
+def can_generate(report_type, period_end, today=None):
+    return refusal_reason(report_type, period_end, today) is None
+
+
+def _building_name(prefix):
+    return Coalesce(f"{prefix}equipment__room__building__name", Value(OUTDOOR_LABEL))
+
+
+# --- Dữ liệu từng báo cáo: generator trả về từng dòng và điền `summary` ---
+
+def open_incidents_rows(period_start, period_end, summary):
+    """Sự cố đang mở (chưa gộp trùng) tại thời điểm tạo báo cáo, theo tòa nhà và mức độ."""
+    rows = (
+        Incident.objects.filter(status__in=OPEN_STATUSES, duplicate_of__isnull=True)
+        .annotate(building=_building_name("asset__"), priority_rank=PRIORITY_ORDER)
+        .values("building", "priority", "priority_rank")
+        .annotate(total=Count("id"))
+        .order_by("building", "priority_rank")
+    )
+    by_priority = {}
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        by_priority[row["priority"]] = by_priority.get(row["priority"], 0) + row["total"]
+        yield row["building"], row["priority"], row["total"]
+    summary["by_priority"] = by_priority
+    summary["total"] = sum(by_priority.values())
+
+
+def maintenance_spend_rows(period_start, period_end, summary):
+    """Số phiếu và chi phí bảo trì trong kỳ, theo tòa nhà và loại bảo trì."""
+    rows = (
+        Maintenance.objects.filter(maintenance_date__gte=period_start, maintenance_date__lt=period_end)
+        .annotate(building=_building_name("asset__"))
+        .values("building", "maintenance_type")
+        .annotate(total=Count("id"), cost=Coalesce(Sum("cost"), Value(Decimal("0"))))
+        .order_by("building", "maintenance_type")
+    )
+    count, cost = 0, Decimal("0")
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        count += row["total"]
+        cost += row["cost"]
+        yield row["building"], row["maintenance_type"], row["total"], row["cost"]
+    summary["count"] = count
+    summary["total_cost"] = str(cost)
+
+
+def dangerous_trees_rows(period_start, period_end, summary):
+    """Cây ở trạng thái nguy hiểm, điểm rủi ro cao trước."""
+    rows = (
+        Tree.objects.filter(health_status="dangerous")
+        .values_list("code", "species", "height", "planted_date", "last_trimmed",
+                      "asset__risk_score", "geom")
+        .order_by(Coalesce("asset__risk_score", Value(-1.0)).desc(), "code")
+    )
+    count = 0
+    for code, species, height, planted, trimmed, risk, geom in rows.iterator(chunk_size=CHUNK_SIZE):
+        count += 1
+        yield (code, species, height, planted, trimmed,
+               None if risk is None else round(risk, 1), round(geom.y, 6), round(geom.x, 6))
+    summary["total"] = count
+
+
+# report_type -> (tiêu đề, tiêu đề cột, hàm sinh dòng)
+REPORTS = {
+    "open_incidents": (
+        "Sự cố đang mở theo tòa nhà và mức độ",
+        ["Tòa nhà", "Mức độ", "Số sự cố"],
+        open_incidents_rows,
+    ),
+    "maintenance_spend": (
+        "Chi phí bảo trì",
+        ["Tòa nhà", "Loại bảo trì", "Số phiếu", "Chi phí"],
+        maintenance_spend_rows,
+    ),
+    "dangerous_trees": (
+        "Cây nguy hiểm",
+        ["Mã cây", "Loài", "Chiều cao (m)", "Ngày trồng", "Cắt tỉa gần nhất", "Điểm rủi ro", "Vĩ độ", "Kinh độ"],
+        dangerous_trees_rows,
+    ),
+}
+
+
+def _write_csv(path, columns, rows):
+    """Ghi CSV từng dòng; trả về số dòng dữ liệu. BOM để Excel đọc đúng tiếng Việt."""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8-sig") as out:
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _pdf_font():
+    """
+    Font TrueType cho PDF: REPORT_PDF_FONT, mặc định DEFAULT_PDF_FONT. Không dùng
+    các font chuẩn của PDF (Helvetica) vì chúng không có dấu tiếng Việt.
+    """
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    path = getattr(settings, "REPORT_PDF_FONT", None) or DEFAULT_PDF_FONT
+    if PDF_FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(PDF_FONT_NAME, path))
+    return PDF_FONT_NAME
+
+
+def _fit(canvas, text, font, size, width):
+    """Cắt bớt nội dung ô cho vừa độ rộng cột."""
+    if canvas.stringWidth(text, font, size) <= width:
+        return text
+    while text and canvas.stringWidth(text + "…", font, size) > width:
+        text = text[:-1]
+    return text + "…"
+
+
+def render_pdf(csv_path, pdf_path, title, subtitle):
+    """
+    Vẽ bảng trong tệp CSV thành PDF khổ A4 ngang: đọc và vẽ từng dòng trực tiếp
+    lên canvas (không dựng bảng Platypus cho toàn bộ dữ liệu), lặp lại tiêu đề
+    cột ở mỗi trang.
+    """
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfgen.canvas import Canvas
+
+    font = _pdf_font()
+    page_width, page_height = landscape(A4)
+    pdf = Canvas(str(pdf_path), pagesize=(page_width, page_height))
+    pdf.setTitle(title)
+
+    with open(csv_path, newline="", encoding="utf-8-sig") as source:
+        reader = csv.reader(source)
+        header = next(reader)
+        column_width = (page_width - 2 * PDF_MARGIN) / len(header)
+        page = 0
+        y = 0
+
+        def start_page():
+            nonlocal page, y
+            if page:
+                pdf.showPage()
+            page += 1
+            y = page_height - PDF_MARGIN
+            pdf.setFont(font, 14)
+            pdf.drawString(PDF_MARGIN, y, title)
+            pdf.setFont(font, 9)
+            pdf.drawRightString(page_width - PDF_MARGIN, y, f"{subtitle} — trang {page}")
+            y -= PDF_LINE_HEIGHT * 2
+            pdf.setFont(font, 9)
+            for index, name in enumerate(header):
+                pdf.drawString(PDF_MARGIN + index * column_width, y,
+                               _fit(pdf, name, font, 9, column_width - 4))
+            pdf.line(PDF_MARGIN, y - 4, page_width - PDF_MARGIN, y - 4)
+            y -= PDF_LINE_HEIGHT
+
+        start_page()
+        empty = True
+        for row in reader:
+            if y < PDF_MARGIN:
+                start_page()
+            for index, value in enumerate(row):
+                pdf.drawString(PDF_MARGIN + index * column_width, y,
+                               _fit(pdf, value, font, 9, column_width - 4))
+            y -= PDF_LINE_HEIGHT
+            empty = False
+        if empty:
+            pdf.drawString(PDF_MARGIN, y, "Không có dữ liệu.")
+    pdf.save()
+
+
+def generate_snapshot(report_type, period_start, period_end, pdf=True):
+    """Tính dữ liệu một báo cáo, ghi CSV (và PDF) rồi lưu thành phiên bản mới của kỳ."""
+    reason = refusal_reason(report_type, period_end)
+    if reason:
+        raise ValueError(reason)
+    title, columns, rows = REPORTS[report_type]
+    summary = {}
+    base_name = f"{report_type}_{period_start:%Y%m%d}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / f"{base_name}.csv"
+        with replica_reads():
+            row_count = _write_csv(csv_path, columns, rows(period_start, period_end, summary))
+        if pdf:
+            pdf_path = Path(tmp) / f"{base_name}.pdf"
+            subtitle = (
+                f"{period_start:%d/%m/%Y} – {period_end - timedelta(days=1):%d/%m/%Y}, "
+                f"tạo lúc {timezone.localtime():%H:%M %d/%m/%Y}"
+            )
+            render_pdf(csv_path, pdf_path, title, subtitle)
+
+        # Phiên bản tiếp theo của kỳ; chạy trùng cùng lúc thì ràng buộc unique báo lỗi
+        version = (
+            ReportSnapshot.objects.filter(report_type=report_type, period_start=period_start)
+            .aggregate(latest=Max("version"))["latest"] or 0
+        ) + 1
+        snapshot = ReportSnapshot(
+            report_type=report_type,
+            period_start=period_start,
+            period_end=period_end,
+            version=version,
+            row_count=row_count,
+            summary=summary,
+        )
+        with open(csv_path, "rb") as data:
+            snapshot.csv_file.save(f"{base_name}_v{version}.csv", File(data), save=False)
+        if pdf:
+            with open(pdf_path, "rb") as data:
+                snapshot.pdf_file.save(f"{base_name}_v{version}.pdf", File(data), save=False)
+        snapshot.save()
+    return snapshot
+
+
+def generate_reports(report_types=None, period_end=None, pdf=True):
+    """
+    Tạo các báo cáo cho tuần kết thúc trước period_end (mặc định tuần trước).
+    Không chỉ định report_types thì tạo mọi báo cáo tạo được cho kỳ đó
+    (bỏ qua những báo cáo có refusal_reason).
+    """
+    if period_end is None:
+        period_start, period_end = weekly_period()
+    else:
+        period_start = period_end - timedelta(days=7)
+    if not report_types:
+        report_types = [report_type for report_type in REPORTS if can_generate(report_type, period_end)]
+    return [
+        generate_snapshot(report_type, period_start, period_end, pdf=pdf)
+        for report_type in report_types
+    ]
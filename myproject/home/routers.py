@@ -0,0 +1,170 @@
+"""
+Định tuyến đọc sang CSDL bản sao (read replica).
+
+- Mọi thao tác ghi và migrate luôn vào `default` (primary).
+- Chỉ các view được đánh dấu @use_replica mới đọc từ bản sao; mỗi request
+  chọn một bản sao và dùng nó cho mọi truy vấn đọc trong request đó.
+- Read-your-writes: sau một request ghi (POST...), ReplicaPinningMiddleware
+  (home/middleware.py) đặt cookie để các request của người dùng đó đọc từ
+  primary trong REPLICA_PIN_SECONDS giây, tránh thấy dữ liệu cũ do bản sao trễ.
+- Tự động quay về primary khi bản sao không kết nối được hoặc trễ quá
+  REPLICA_MAX_LAG_SECONDS; view đang chạy trên bản sao mà gặp lỗi kết nối
+  được chạy lại một lần trên primary.
+
+Việc nền đọc nhiều (ví dụ tạo báo cáo) dùng `with replica_reads():`.
+
+Bản sao là các alias "replica_*" trong DATABASES (xem DB_REPLICAS trong settings).
+"""
+import contextlib
+import functools
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = "db_pin"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# True khi request hiện tại được phép đọc từ bản sao
+_use_replica = ContextVar("use_replica", default=False)
+# Bản sao đã chọn cho request hiện tại (None = chưa chọn)
+_replica_alias = ContextVar("replica_alias", default=None)
+
+# alias -> thời điểm (time.monotonic) được phép thử lại bản sao đang lỗi
+_unhealthy_until = {}
+# alias -> (khỏe hay không, thời điểm kiểm tra)
+_health_checked = {}
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica")]
+
+
+def mark_unhealthy(alias):
+    interval = getattr(settings, "REPLICA_HEALTH_CHECK_INTERVAL", 30)
+    _unhealthy_until[alias] = time.monotonic() + interval
+    _health_checked.pop(alias, None)
+    logger.warning("Bản sao %s không dùng được, chuyển sang primary trong %s giây", alias, interval)
+
+
+# Độ trễ (giây) của bản sao. Đã áp dụng hết WAL nhận được thì coi là bắt kịp:
+# khi primary không ghi gì, now() - pg_last_xact_replay_timestamp() cứ tăng dù
+# bản sao không hề chậm. Hàm trả về NULL trên máy không phải standby (ví dụ CSDL
+# thứ hai dùng khi thử nghiệm) nên rơi vào COALESCE(..., 0).
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+def _check_health(alias):
+    """Kết nối được và độ trễ sao chép không vượt REPLICA_MAX_LAG_SECONDS."""
+    max_lag = getattr(settings, "REPLICA_MAX_LAG_SECONDS", 30)
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(REPLICA_LAG_SQL)
+            lag = cursor.fetchone()[0]
+    except DatabaseError:
+        return False
+    return lag <= max_lag
+
+
+def is_healthy(alias):
+    now = time.monotonic()
+    if _unhealthy_until.get(alias, 0) > now:
+        return False
+    healthy, checked_at = _health_checked.get(alias, (None, 0))
+    if healthy is None or now - checked_at > getattr(settings, "REPLICA_HEALTH_CHECK_INTERVAL", 30):
+        healthy = _check_health(alias)
+        if not healthy:
+            mark_unhealthy(alias)
+            return False
+        _health_checked[alias] = (True, now)
+    return healthy
+
+
+def _choose_replica():
+    alias = _replica_alias.get()
+    if alias is None:
+        healthy = [alias for alias in replica_aliases() if is_healthy(alias)]
+        alias = random.choice(healthy) if healthy else "default"
+        _replica_alias.set(alias)
+    return alias
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get():
+            return _choose_replica()
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Các bản sao chứa cùng dữ liệu với primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+def use_replica(view):
+    """
+    Cho phép view chỉ đọc lấy dữ liệu từ bản sao. Request ghi, hoặc người dùng
+    vừa ghi (còn cookie ghim), vẫn đọc từ primary.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            not replica_aliases()
+            or request.method not in SAFE_METHODS
+            or request.COOKIES.get(PIN_COOKIE)
+        ):
+            return view(request, *args, **kwargs)
+
+        flag = _use_replica.set(True)
+        alias = _replica_alias.set(None)
+        try:
+            return view(request, *args, **kwargs)
+        except OperationalError:
+            failed = _replica_alias.get()
+            if failed in (None, "default"):
+                raise
+            mark_unhealthy(failed)
+        finally:
+            _replica_alias.reset(alias)
+            _use_replica.reset(flag)
+        # Bản sao lỗi giữa chừng: chạy lại view trên primary
+        return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+
+@contextlib.contextmanager
+def replica_reads():
+    """
+    Các truy vấn đọc trong khối with đi tới một bản sao khỏe (nếu có). Không tự
+    chạy lại: lỗi kết nối bản sao được ghi nhận rồi ném ra để việc nền thử lại
+    (lần sau sẽ đọc từ primary).
+    """
+    flag = _use_replica.set(bool(replica_aliases()))
+    alias = _replica_alias.set(None)
+    try:
+        yield
+    except OperationalError:
+        failed = _replica_alias.get()
+        if failed not in (None, "default"):
+            mark_unhealthy(failed)
+        raise
+    finally:
+        _replica_alias.reset(alias)
+        _use_replica.reset(flag)
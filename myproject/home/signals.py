@@ -0,0 +1,121 @@
+"""
+Cập nhật điểm rủi ro của tài sản mỗi khi dữ liệu liên quan thay đổi.
+Việc tính lại được đưa vào hàng đợi nền để request trả về ngay.
+
+Đồng thời tăng phiên bản dữ liệu (home/cache.py) để các kết quả đã cache
+(phân tích coverage, lựa chọn trong form, các đoạn template của dashboard)
+không còn được dùng khi dữ liệu tương ứng thay đổi, và cập nhật chỉ mục không
+gian trong bộ nhớ (home/spatial_index.py) nếu tiến trình này đã xây nó.
+"""
+import sys
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .analysis import DATA_NAMESPACE as SPATIAL_NAMESPACE
+from .cache import CHOICES, INCIDENTS, bump_on_commit, maintenance_namespace
+from .jobs import enqueue
+from .models import Asset, Building, Equipment, Incident, IncidentType, Maintenance, Room, Tree
+
+
+@receiver(post_save, sender=Maintenance)
+@receiver(post_delete, sender=Maintenance)
+@receiver(post_save, sender=Incident)
+@receiver(post_delete, sender=Incident)
+def refresh_asset_health_for_event(sender, instance, **kwargs):
+    """Phiếu bảo trì / sự cố thay đổi: tính lại điểm cho đúng tài sản liên quan."""
+    if instance.asset_id and Asset.objects.filter(pk=instance.asset_id).exists():
+        enqueue("refresh_asset_health", {"asset_ids": [instance.asset_id]})
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_save, sender=Tree)
+def refresh_asset_health_for_object(sender, instance, created, **kwargs):
+    """Thiết bị / cây thay đổi tình trạng hoặc ngày lắp đặt: tính lại điểm tài sản tương ứng."""
+    if created:
+        return
+    lookup = "equipment" if sender is Equipment else "tree"
+    asset_ids = list(Asset.objects.filter(**{lookup: instance}).values_list("pk", flat=True))
+    if asset_ids:
+        enqueue("refresh_asset_health", {"asset_ids": asset_ids})
+
+
+@receiver(post_save, sender=Asset)
+def refresh_asset_health_for_new_asset(sender, instance, created, **kwargs):
+    """Tài sản mới đăng ký: tính điểm ngay để hiển thị trên bản đồ."""
+    if created:
+        enqueue("refresh_asset_health", {"asset_ids": [instance.pk]})
+
+
+@receiver(post_save, sender=Building)
+@receiver(post_delete, sender=Building)
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+def invalidate_spatial_analysis(sender, **kwargs):
+    """
+    Dữ liệu không gian thay đổi: bỏ qua kết quả phân tích coverage và danh sách
+    trạng thái phòng (dashboard giảng viên) đã cache.
+    """
+    bump_on_commit(SPATIAL_NAMESPACE)
+
+
+@receiver(post_save, sender=Asset)
+@receiver(post_delete, sender=Asset)
+@receiver(post_save, sender=IncidentType)
+@receiver(post_delete, sender=IncidentType)
+def invalidate_form_choices(sender, **kwargs):
+    bump_on_commit(CHOICES)
+
+
+@receiver(post_save, sender=Incident)
+@receiver(post_delete, sender=Incident)
+def invalidate_recent_incidents(sender, **kwargs):
+    bump_on_commit(INCIDENTS)
+
+
+@receiver(post_save, sender=Maintenance)
+@receiver(post_delete, sender=Maintenance)
+def invalidate_recent_maintenance(sender, instance, **kwargs):
+    if instance.staff_id:
+        bump_on_commit(maintenance_namespace(instance.staff_id))
+
+
+SPATIAL_INDEX_KINDS = {Tree: "tree", Equipment: "equipment", Room: "room"}
+
+
+def _loaded_spatial_index(sender):
+    """
+    Chỉ mục không gian đã xây của loại đối tượng này, hoặc None. Tiến trình chưa
+    import home.spatial_index (worker, lệnh quản trị) thì chắc chắn chưa có chỉ
+    mục, không cần import module này chỉ để kiểm tra.
+    """
+    module = sys.modules.get("home.spatial_index")
+    return module.loaded_index(SPATIAL_INDEX_KINDS[sender]) if module else None
+
+
+@receiver(post_save, sender=Tree)
+@receiver(post_save, sender=Equipment)
+@receiver(post_save, sender=Room)
+def update_spatial_index(sender, instance, **kwargs):
+    """Điểm mới / di chuyển: cập nhật chỉ mục sau khi commit (chưa xây thì bỏ qua)."""
+    index = _loaded_spatial_index(sender)
+    if index is None:
+        return
+    pk, geom = instance.pk, instance.geom
+    if geom is None:
+        transaction.on_commit(lambda: index.remove(pk))
+    else:
+        transaction.on_commit(lambda: index.upsert(pk, geom.x, geom.y))
+
+
+@receiver(post_delete, sender=Tree)
+@receiver(post_delete, sender=Equipment)
+@receiver(post_delete, sender=Room)
+def remove_from_spatial_index(sender, instance, **kwargs):
+    index = _loaded_spatial_index(sender)
+    if index is not None:
+        pk = instance.pk
+        transaction.on_commit(lambda: index.remove(pk))
@@ -0,0 +1,306 @@
+"""
+Chỉ mục không gian trong bộ nhớ cho các truy vấn điểm "nóng" (tài sản nào ở
+gần điểm người dùng bấm, phòng nào gần nhất...), không cần một vòng gọi PostGIS.
+
+- Mỗi loại đối tượng (tree / equipment / room) là một PointIndex: mảng NumPy id
+  (int64) và tọa độ (mét, phép chiếu phẳng cục bộ quanh khuôn viên), sắp theo ô
+  lưới SPATIAL_INDEX_CELL_M mét; không giữ đối tượng model.
+- Xây lười ở lần truy vấn đầu tiên bằng một câu SELECT id, ST_X, ST_Y.
+- Signal lưu / xóa cập nhật tăng dần: bản ghi mới hoặc đã di chuyển vào bộ đệm
+  delta, bản ghi cũ bị đánh dấu xóa (tombstone); khi delta lớn thì gộp lại
+  trong bộ nhớ, không đọc lại CSDL.
+- Mỗi tiến trình có chỉ mục riêng và chỉ thấy signal của chính nó, nên chỉ mục
+  được xây lại sau SPATIAL_INDEX_MAX_AGE giây.
+
+SPATIAL_INDEX_ENABLED = False thì nearest() / within() truy vấn thẳng PostGIS.
+"""
+import math
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+from django.conf import settings
+from django.db import connections, router
+
+from .geo import METERS_PER_DEGREE
+from .models import Equipment, Room, Tree
+
+MODELS = {"tree": Tree, "equipment": Equipment, "room": Room}
+
+# Tìm lân cận gần nhất theo vòng ô lưới tối đa bấy nhiêu vòng, sau đó quét toàn bộ
+MAX_RING_SEARCH = 8
+# Số ứng viên lấy theo KNN (<->, đơn vị độ) trước khi xếp lại theo mét trên geography
+DB_KNN_CANDIDATES = 8
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class _Snapshot(NamedTuple):
+    ids: np.ndarray           # int64, sắp theo ô lưới
+    xy: np.ndarray            # float64 (n, 2), mét
+    cell_keys: np.ndarray     # khoá các ô khác rỗng, tăng dần
+    cell_starts: np.ndarray   # ô cell_keys[i] gồm các điểm cell_starts[i]:cell_starts[i + 1]
+    tombstones: np.ndarray    # id trong mảng chính không còn hợp lệ (đã xóa / di chuyển)
+    delta: dict               # id -> (x, y) thêm mới / di chuyển sau lần xây
+
+
+class PointIndex:
+    """
+    Chỉ mục lưới cho một tập điểm. Toàn bộ trạng thái nằm trong một _Snapshot
+    bất biến; thay đổi tạo snapshot mới rồi gán lại, nên truy vấn không cần khóa
+    và luôn thấy một trạng thái nhất quán.
+    """
+
+    def __init__(self, ids, lons, lats, cell_size, origin_lat=None):
+        ids = np.asarray(ids, dtype=np.int64)
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        if origin_lat is None:
+            # Bảng rỗng: dùng vĩ độ khuôn viên để các điểm upsert sau có tỉ lệ x đúng
+            origin_lat = float(lats.mean()) if len(lats) else _setting("SPATIAL_INDEX_ORIGIN_LAT", 0.0)
+        self.cell_size = float(cell_size)
+        self.kx = METERS_PER_DEGREE * math.cos(math.radians(origin_lat))
+        self.ky = METERS_PER_DEGREE
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._snapshot = self._build(ids, np.column_stack([lons * self.kx, lats * self.ky]))
+        self._id_set = set(ids.tolist())
+
+    def _build(self, ids, xy):
+        cells = np.floor(xy / self.cell_size).astype(np.int64)
+        keys = _cell_keys(cells[:, 0], cells[:, 1])
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        cell_keys, starts = np.unique(keys, return_index=True)
+        return _Snapshot(
+            ids=ids[order],
+            xy=xy[order],
+            cell_keys=cell_keys,
+            cell_starts=np.append(starts, len(keys)).astype(np.int64),
+            tombstones=np.empty(0, np.int64),
+            delta={},
+        )
+
+    def _project(self, lon, lat):
+        return lon * self.kx, lat * self.ky
+
+    def __len__(self):
+        snap = self._snapshot
+        return len(snap.ids) - len(snap.tombstones) + len(snap.delta)
+
+    # --- cập nhật tăng dần (từ signal) ---
+
+    def upsert(self, pk, lon, lat):
+        with self._lock:
+            snap = self._snapshot
+            tombstones = snap.tombstones
+            if pk in self._id_set:
+                tombstones = np.union1d(tombstones, [pk])
+            snap = snap._replace(tombstones=tombstones, delta={**snap.delta, pk: self._project(lon, lat)})
+            if len(snap.delta) > _setting("SPATIAL_INDEX_DELTA_LIMIT", 1000):
+                snap = self._compact(snap)
+            self._snapshot = snap
+
+    def remove(self, pk):
+        with self._lock:
+            snap = self._snapshot
+            delta = {key: value for key, value in snap.delta.items() if key != pk}
+            tombstones = snap.tombstones
+            if pk in self._id_set:
+                tombstones = np.union1d(tombstones, [pk])
+            self._snapshot = snap._replace(tombstones=tombstones, delta=delta)
+
+    def _compact(self, snap):
+        """Gộp delta và tombstone vào mảng chính (chỉ trong bộ nhớ, không đọc CSDL)."""
+        ids, xy = _valid_points(snap, np.arange(len(snap.ids)))
+        self._id_set = set(ids.tolist())
+        return self._build(ids, xy)
+
+    # --- truy vấn ---
+
+    def _candidates(self, snap, x, y, radius_cells):
+        """(ids, xy) các điểm hợp lệ trong hình vuông (2r+1)x(2r+1) ô quanh (x, y), kể cả delta."""
+        cx, cy = math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+        span = np.arange(-radius_cells, radius_cells + 1, dtype=np.int64)
+        keys = _cell_keys(np.repeat(cx + span, len(span)), np.tile(cy + span, len(span)))
+        positions = np.searchsorted(snap.cell_keys, keys)
+        found = positions < len(snap.cell_keys)
+        positions, keys = positions[found], keys[found]
+        positions = positions[snap.cell_keys[positions] == keys]
+        if len(positions):
+            index = np.concatenate([
+                np.arange(start, end)
+                for start, end in zip(snap.cell_starts[positions], snap.cell_starts[positions + 1])
+            ])
+        else:
+            index = np.empty(0, np.int64)
+        return _valid_points(snap, index)
+
+    def within(self, lon, lat, radius_m):
+        """[(id, khoảng cách m)] các điểm trong bán kính, gần nhất trước."""
+        snap = self._snapshot
+        x, y = self._project(lon, lat)
+        ids, xy = self._candidates(snap, x, y, math.ceil(radius_m / self.cell_size))
+        distances = np.hypot(xy[:, 0] - x, xy[:, 1] - y)
+        mask = distances <= radius_m
+        ids, distances = ids[mask], distances[mask]
+        order = np.argsort(distances)
+        return list(zip(ids[order].tolist(), distances[order].tolist()))
+
+    def nearest(self, lon, lat, max_distance_m=None):
+        """(id, khoảng cách m) của điểm gần nhất, hoặc None."""
+        snap = self._snapshot
+        x, y = self._project(lon, lat)
+        for ring in range(MAX_RING_SEARCH + 1):
+            ids, xy = self._candidates(snap, x, y, ring)
+            if len(ids):
+                distances = np.hypot(xy[:, 0] - x, xy[:, 1] - y)
+                best = int(np.argmin(distances))
+                # Mọi điểm ngoài các ô đã xét đều cách ít nhất ring * cell_size
+                if distances[best] <= ring * self.cell_size:
+                    break
+        else:
+            ids, xy = _valid_points(snap, np.arange(len(snap.ids)))
+            if not len(ids):
+                return None
+            distances = np.hypot(xy[:, 0] - x, xy[:, 1] - y)
+            best = int(np.argmin(distances))
+
+        if max_distance_m is not None and distances[best] > max_distance_m:
+            return None
+        return int(ids[best]), float(distances[best])
+
+
+def _cell_keys(cx, cy):
+    """Gộp chỉ số ô (cx, cy) thành một khoá int64."""
+    return (np.asarray(cx, np.int64) << 32) ^ (np.asarray(cy, np.int64) & 0xFFFFFFFF)
+
+
+def _valid_points(snap, index):
+    """Các điểm snap.ids[index] chưa bị đánh dấu xóa, cộng thêm các điểm trong delta."""
+    ids, xy = snap.ids[index], snap.xy[index]
+    if len(snap.tombstones):
+        keep = ~np.isin(ids, snap.tombstones)
+        ids, xy = ids[keep], xy[keep]
+    if snap.delta:
+        ids = np.concatenate([ids, np.fromiter(snap.delta.keys(), np.int64, len(snap.delta))])
+        xy = np.concatenate([xy, np.array(list(snap.delta.values()), np.float64).reshape(-1, 2)])
+    return ids, xy
+
+
+_indexes = {}
+_build_lock = threading.Lock()
+
+
+def enabled():
+    return _setting("SPATIAL_INDEX_ENABLED", True)
+
+
+def _connection(kind):
+    """Kết nối đọc theo DATABASE_ROUTERS (bản sao khi view dùng @use_replica)."""
+    return connections[router.db_for_read(MODELS[kind])]
+
+
+def _load_points(kind):
+    connection = _connection(kind)
+    table = connection.ops.quote_name(MODELS[kind]._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT id, ST_X(geom), ST_Y(geom) FROM {table} WHERE geom IS NOT NULL")
+        rows = cursor.fetchall()
+    if not rows:
+        return [], [], []
+    ids, lons, lats = zip(*rows)
+    return ids, lons, lats
+
+
+def build_index(kind):
+    ids, lons, lats = _load_points(kind)
+    return PointIndex(ids, lons, lats, _setting("SPATIAL_INDEX_CELL_M", 25))
+
+
+def get_index(kind):
+    """Chỉ mục của một loại đối tượng; xây (lại) khi chưa có hoặc quá SPATIAL_INDEX_MAX_AGE giây."""
+    if kind not in MODELS:
+        raise ValueError(f"Loại đối tượng '{kind}' không hợp lệ")
+    index = _indexes.get(kind)
+    max_age = _setting("SPATIAL_INDEX_MAX_AGE", 300)
+    if index is None or time.monotonic() - index.built_at > max_age:
+        with _build_lock:
+            index = _indexes.get(kind)
+            if index is None or time.monotonic() - index.built_at > max_age:
+                index = _indexes[kind] = build_index(kind)
+    return index
+
+
+def loaded_index(kind):
+    """Chỉ mục đã xây (None nếu chưa), dùng cho signal: chưa xây thì không cần cập nhật."""
+    return _indexes.get(kind)
+
+
+def reset():
+    _indexes.clear()
+
+
+# --- Đường truy vấn PostGIS (khi tắt chỉ mục, và để so sánh trong benchmark) ---
+
+NEAREST_SQL = """
+SELECT id, dist FROM (
+    SELECT id, ST_Distance(geom::geography, ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)::geography) AS dist
+    FROM {table}
+    ORDER BY geom <-> ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)
+    LIMIT {candidates}
+) AS knn
+ORDER BY dist
+LIMIT 1
+"""
+
+WITHIN_SQL = """
+SELECT id, ST_Distance(geom::geography, p::geography) AS dist
+FROM {table}, ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326) AS p
+WHERE geom && ST_Expand(p, %(radius_deg)s)
+  AND ST_DWithin(geom::geography, p::geography, %(radius_m)s)
+ORDER BY dist
+"""
+
+
+def nearest_db(kind, lon, lat, max_distance_m=None):
+    connection = _connection(kind)
+    table = connection.ops.quote_name(MODELS[kind]._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            NEAREST_SQL.format(table=table, candidates=DB_KNN_CANDIDATES),
+            {"lon": lon, "lat": lat},
+        )
+        row = cursor.fetchone()
+    if row is None or (max_distance_m is not None and row[1] > max_distance_m):
+        return None
+    return int(row[0]), float(row[1])
+
+
+def within_db(kind, lon, lat, radius_m):
+    connection = _connection(kind)
+    table = connection.ops.quote_name(MODELS[kind]._meta.db_table)
+    radius_deg = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            WITHIN_SQL.format(table=table),
+            {"lon": lon, "lat": lat, "radius_m": radius_m, "radius_deg": radius_deg},
+        )
+        return [(int(pk), float(dist)) for pk, dist in cursor.fetchall()]
+
+
+def nearest(kind, lon, lat, max_distance_m=None):
+    """(id, khoảng cách m) của đối tượng `kind` gần (lon, lat) nhất, hoặc None."""
+    if not enabled():
+        return nearest_db(kind, lon, lat, max_distance_m)
+    return get_index(kind).nearest(lon, lat, max_distance_m)
+
+
+def within(kind, lon, lat, radius_m):
+    """[(id, khoảng cách m)] các đối tượng `kind` trong bán kính, gần nhất trước."""
+    if not enabled():
+        return within_db(kind, lon, lat, radius_m)
+    return get_index(kind).within(lon, lat, radius_m)
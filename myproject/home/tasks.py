@@ -0,0 +1,44 @@
+"""
+Các công việc nền của ứng dụng (chạy bởi `manage.py run_worker`).
+
+Module này được nạp trong AppConfig.ready() của mọi tiến trình (web, lệnh quản
+trị), nên phần xử lý chỉ được import khi công việc thực sự chạy.
+"""
+from datetime import date
+
+from .jobs import task
+
+
+@task("refresh_asset_health")
+def refresh_asset_health(asset_ids=None):
+    """Tính lại điểm rủi ro cho các tài sản (tất cả nếu asset_ids là None)."""
+    from .health import recompute_asset_health
+
+    recompute_asset_health(asset_ids)
+
+
+@task("deduplicate_incidents")
+def deduplicate_incidents(radius_m=None, window_hours=None):
+    """Gộp sự cố trùng lặp trong lịch sử."""
+    from .dedup import deduplicate_history
+
+    deduplicate_history(radius_m=radius_m, window_hours=window_hours)
+
+
+@task("maintain_partitions")
+def maintain_history_partitions(archive=True):
+    """Tạo trước phân vùng tháng tới và lưu trữ phân vùng cũ."""
+    from .partitioning import maintain_partitions
+
+    maintain_partitions(archive=archive)
+
+
+@task("generate_reports")
+def generate_weekly_reports(report_types=None, period_end=None):
+    """Tạo báo cáo tuần (period_end dạng 'YYYY-MM-DD', mặc định tuần trước)."""
+    from .reports import generate_reports
+
+    generate_reports(
+        report_types,
+        period_end=date.fromisoformat(period_end) if period_end else None,
+    )
@@ -0,0 +1,27 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from home import analysis
+
+
+@mock.patch("home.analysis.get_data_version", return_value=3)
+@mock.patch("home.analysis.cache")
+class CoverageCacheKeyTests(SimpleTestCase):
+    def key_for(self, cache, params):
+        cache.get.return_value = "{}"
+        analysis._cached("equipment", params, lambda: "{}")
+        return cache.get.call_args.args[0]
+
+    def test_key_is_memcached_safe(self, cache, _version):
+        key = self.key_for(cache, {"equipment_type": "máy chiếu\n" + "x" * 300, "radius_m": 50.0})
+        self.assertTrue(key.startswith("coverage:3:equipment:"))
+        self.assertLessEqual(len(key), 250)
+        self.assertTrue(key.isascii())
+        self.assertFalse(any(char.isspace() or ord(char) < 33 for char in key))
+
+    def test_key_depends_on_params(self, cache, _version):
+        self.assertEqual(
+            self.key_for(cache, {"a": 1, "b": 2}), self.key_for(cache, {"b": 2, "a": 1})
+        )
+        self.assertNotEqual(self.key_for(cache, {"a": 1}), self.key_for(cache, {"a": 2}))
@@ -0,0 +1,91 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from home.forms import AppUserAdminForm
+from home.hashers import ConfigurablePBKDF2PasswordHasher, hash_password
+from home.models import AppUser, Role
+
+
+class HasherTests(SimpleTestCase):
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_iterations_never_below_django_default(self):
+        self.assertEqual(ConfigurablePBKDF2PasswordHasher().iterations, PBKDF2PasswordHasher.iterations)
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=None)
+    def test_must_update_only_upgrades(self):
+        hasher = ConfigurablePBKDF2PasswordHasher()
+        default = PBKDF2PasswordHasher.iterations
+        self.assertTrue(hasher.must_update(hash_password("secret", default - 1)))
+        self.assertFalse(hasher.must_update(hash_password("secret", default)))
+        self.assertFalse(hasher.must_update(hash_password("secret", default + 1)))
+
+
+class ProvisionUsersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = Role.objects.create(name="teacher")
+        Role.objects.create(name="admin")
+
+    def provision(self, content):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", encoding="utf-8", delete=False) as f:
+            f.write(content)
+        self.addCleanup(os.remove, f.name)
+        call_command("provision_users", f.name, workers=1, stdout=StringIO())
+
+    def test_provisioned_users_can_authenticate(self):
+        self.provision("username,password,role\ngv01,Mat-khau-1,\nqt01,Mat-khau-2,admin\n")
+
+        user = authenticate(username="gv01", password="Mat-khau-1")
+        self.assertIsNotNone(user)
+        self.assertEqual(user.app_user.role, self.teacher)
+        self.assertTrue(authenticate(username="qt01", password="Mat-khau-2").is_staff)
+        self.assertIsNone(authenticate(username="gv01", password="sai"))
+
+        # Băm đủ mạnh ngay từ đầu nên không cần băm lại ở lần đăng nhập đầu
+        encoded = get_user_model().objects.get(username="gv01").password
+        self.assertFalse(ConfigurablePBKDF2PasswordHasher().must_update(encoded))
+
+    def test_existing_users_are_skipped(self):
+        get_user_model().objects.create_user("gv01", password="cu")
+        self.provision("username,password\ngv01,moi\ngv02,moi\n")
+        self.assertIsNotNone(authenticate(username="gv01", password="cu"))
+        self.assertEqual(AppUser.objects.filter(user__username="gv02").count(), 1)
+
+
+class AppUserAdminFormTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_role = Role.objects.create(name="admin")
+        cls.teacher = Role.objects.create(name="teacher")
+
+    def form(self, data, instance=None):
+        form = AppUserAdminForm(data, instance=instance)
+        self.assertTrue(form.is_valid(), form.errors)
+        return form
+
+    def test_commit_false_writes_nothing_until_save_m2m(self):
+        form = self.form({"username": "qt01", "password": "Mat-khau-1", "role": self.admin_role.pk})
+        app_user = form.save(commit=False)
+        self.assertFalse(get_user_model().objects.filter(username="qt01").exists())
+
+        form.save_user()
+        app_user.save()
+        form.save_m2m()
+        user = get_user_model().objects.get(username="qt01")
+        self.assertTrue(user.is_staff)
+        self.assertEqual(user.app_user, app_user)
+
+    def test_is_staff_revoked_when_role_changes_from_admin(self):
+        app_user = self.form({"username": "qt01", "password": "Mat-khau-1", "role": self.admin_role.pk}).save()
+        self.assertTrue(app_user.user.is_staff)
+
+        self.form({"username": "qt01", "password": "", "role": self.teacher.pk}, instance=app_user).save()
+        user = get_user_model().objects.get(username="qt01")
+        self.assertFalse(user.is_staff)
+        self.assertTrue(user.check_password("Mat-khau-1"))
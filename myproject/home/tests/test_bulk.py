@@ -0,0 +1,36 @@
+import json
+
+from django.test import RequestFactory, SimpleTestCase
+
+from home.bulk import _validate_choice
+from home.models import Incident
+from home.views import _parse_bulk_payload
+
+
+class BulkPayloadTests(SimpleTestCase):
+    def parse(self, data):
+        request = RequestFactory().post("/", json.dumps(data), content_type="application/json")
+        return _parse_bulk_payload(request)
+
+    def test_integer_ids_accepted(self):
+        self.assertEqual(self.parse({"ids": [1, 2], "status": "closed"})["ids"], [1, 2])
+
+    def test_non_integer_ids_rejected(self):
+        for ids in ([[1]], [{}], ["1"], [1.5], [True], [], None):
+            with self.subTest(ids=ids):
+                self.assertIsNone(self.parse({"ids": ids}))
+
+    def test_invalid_json_rejected(self):
+        request = RequestFactory().post("/", "{", content_type="application/json")
+        self.assertIsNone(_parse_bulk_payload(request))
+
+
+class ValidateChoiceTests(SimpleTestCase):
+    def test_valid_and_missing_values(self):
+        _validate_choice("closed", Incident.STATUS, "status")
+        _validate_choice(None, Incident.STATUS, "status")
+
+    def test_unhashable_or_unknown_values_raise_value_error(self):
+        for value in (["closed"], {"a": 1}, 1, "nope"):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                _validate_choice(value, Incident.STATUS, "status")
@@ -0,0 +1,100 @@
+import math
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.gis.geos import Point, Polygon
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from home import health
+from home.models import Asset, Building, Equipment, Maintenance, Room, Tree
+
+
+class HelperTests(SimpleTestCase):
+    def test_scatter_places_values_and_fills_missing(self):
+        ids = np.array([1, 3, 5, 7], dtype=np.int64)
+        result = health._scatter(ids, [7, 3, 9], [70.0, 30.0, 90.0], 0.0, float)
+        np.testing.assert_array_equal(result, [0.0, 30.0, 0.0, 70.0])
+
+    def test_scatter_dates_with_nat(self):
+        ids = np.array([1, 2], dtype=np.int64)
+        result = health._scatter(ids, [2], [timezone.localdate()], np.datetime64("NaT"), "datetime64[D]")
+        self.assertTrue(np.isnat(result[0]))
+        self.assertEqual(result[1], np.datetime64(timezone.localdate(), "D"))
+
+    def test_scatter_decimal_values(self):
+        ids = np.array([4], dtype=np.int64)
+        result = health._scatter(ids, [4], [Decimal("1234.50")], 0.0, float)
+        self.assertEqual(result[0], 1234.5)
+
+    def test_category_scores_handles_none(self):
+        labels = np.array(["broken", None, "good"], dtype=object)
+        np.testing.assert_array_equal(health._category_scores(labels, health.STATUS_SCORES), [1.0, 0.0, 0.0])
+
+
+class ScoreTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        building = Building.objects.create(
+            name="A1", geom=Polygon(((106.66, 10.79), (106.661, 10.79), (106.661, 10.791), (106.66, 10.79))),
+        )
+        room = Room.objects.create(name="101", room_type="classroom", building=building, geom=Point(106.6605, 10.7905))
+        # Thiết bị hỏng, không rõ ngày lắp đặt, chưa từng bảo trì
+        cls.equipment = Equipment.objects.create(
+            code="PJ-01", name="Máy chiếu", equipment_type="projector", status="broken",
+            install_date=None, room=room, geom=Point(106.6605, 10.7905),
+        )
+        cls.equipment_asset = Asset.objects.create(equipment=cls.equipment, asset_type="equipment")
+        # Cây tốt, trồng 10 năm, bảo trì 100 ngày trước với chi phí Decimal
+        cls.tree = Tree.objects.create(
+            code="T-01", species="Sao", health_status="good",
+            planted_date=today - timedelta(days=3650), geom=Point(106.662, 10.792),
+        )
+        cls.tree_asset = Asset.objects.create(tree=cls.tree, asset_type="tree")
+        cls.cost = Decimal("1500000.50")
+        Maintenance.objects.create(
+            asset=cls.tree_asset, maintenance_type="trim",
+            maintenance_date=today - timedelta(days=100), cost=cls.cost,
+        )
+
+    def test_no_maintenance_and_null_install_date(self):
+        ids, scores = health.compute_scores([self.equipment_asset.pk])
+        self.assertEqual(ids.tolist(), [self.equipment_asset.pk])
+        # Hỏng (1.0), tuổi không rõ (0), chưa bảo trì và không có mốc (gap 1.0), không chi phí, không sự cố
+        expected = 100 * (health.WEIGHTS["status"] + health.WEIGHTS["maintenance_gap"])
+        self.assertAlmostEqual(scores[0], expected, places=2)
+
+    def test_decimal_costs(self):
+        ids, scores = health.compute_scores([self.tree_asset.pk])
+        expected = 100 * (
+            health.WEIGHTS["age"] * 3650 / health.EXPECTED_LIFETIME_DAYS["tree"]
+            + health.WEIGHTS["maintenance_gap"] * 100 / health.MAINTENANCE_GAP_DAYS
+            + health.WEIGHTS["maintenance_cost"] * math.log1p(float(self.cost)) / math.log1p(health.COST_REFERENCE)
+        )
+        self.assertAlmostEqual(scores[0], round(expected, 2), places=2)
+
+    def test_all_assets_sorted_by_id(self):
+        ids, scores = health.compute_scores()
+        self.assertEqual(ids.tolist(), sorted([self.equipment_asset.pk, self.tree_asset.pk]))
+        self.assertEqual(len(scores), 2)
+
+    def test_unknown_assets(self):
+        ids, scores = health.compute_scores([0])
+        self.assertEqual(len(ids), 0)
+        self.assertEqual(len(scores), 0)
+
+    def test_store_scores_round_trip(self):
+        health.store_scores(np.array([self.equipment_asset.pk], dtype=np.int64), np.array([42.5]))
+        self.equipment_asset.refresh_from_db()
+        self.tree_asset.refresh_from_db()
+        self.assertEqual(self.equipment_asset.risk_score, 42.5)
+        self.assertIsNotNone(self.equipment_asset.risk_updated_at)
+        self.assertIsNone(self.tree_asset.risk_score)
+
+    def test_recompute_asset_health_stores_computed_scores(self):
+        self.assertEqual(health.recompute_asset_health(), 2)
+        _ids, scores = health.compute_scores([self.tree_asset.pk])
+        self.tree_asset.refresh_from_db()
+        self.assertAlmostEqual(self.tree_asset.risk_score, scores[0], places=2)
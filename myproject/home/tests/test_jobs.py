@@ -0,0 +1,63 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from home import jobs
+from home.models import Job
+
+
+@override_settings(JOB_LOCK_TIMEOUT=60, JOB_HEARTBEAT_INTERVAL=0.01)
+class RequeueStaleJobsTests(TestCase):
+    def make_running(self, attempts, locked_seconds_ago):
+        return Job.objects.create(
+            name="refresh_asset_health", status="running", attempts=attempts, max_attempts=3,
+            locked_by="host:1:0", locked_at=timezone.now() - timedelta(seconds=locked_seconds_ago),
+        )
+
+    def test_stale_job_with_attempts_left_is_requeued(self):
+        job = self.make_running(attempts=1, locked_seconds_ago=120)
+        self.assertEqual(jobs.requeue_stale_jobs(), (1, 0))
+        job.refresh_from_db()
+        self.assertEqual(job.status, "queued")
+        self.assertIsNone(job.locked_by)
+        self.assertGreater(job.run_after, timezone.now())
+
+    def test_stale_job_out_of_attempts_fails(self):
+        job = self.make_running(attempts=3, locked_seconds_ago=120)
+        self.assertEqual(jobs.requeue_stale_jobs(), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertIsNotNone(job.finished_at)
+
+    def test_job_with_recent_heartbeat_is_left_running(self):
+        job = self.make_running(attempts=1, locked_seconds_ago=10)
+        self.assertEqual(jobs.requeue_stale_jobs(), (0, 0))
+        job.refresh_from_db()
+        self.assertEqual(job.status, "running")
+
+
+@override_settings(JOB_LOCK_TIMEOUT=60, JOB_HEARTBEAT_INTERVAL=0.01)
+class HeartbeatTests(TransactionTestCase):
+    # Luồng heartbeat dùng kết nối riêng nên dòng việc phải được commit thật
+    def test_run_job_advances_locked_at_while_running(self):
+        started = timezone.now() - timedelta(seconds=30)
+        job = Job.objects.create(
+            name="slow", status="running", attempts=1, max_attempts=3,
+            locked_by="host:1:0", locked_at=started,
+        )
+
+        def slow():
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                if Job.objects.get(pk=job.pk).locked_at > started:
+                    return
+                time.sleep(0.01)
+            self.fail("locked_at không được cập nhật trong khi việc đang chạy")
+
+        with mock.patch.dict(jobs.REGISTRY, {"slow": slow}):
+            self.assertEqual(jobs.run_job(job), "done")
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
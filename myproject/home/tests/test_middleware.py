@@ -0,0 +1,28 @@
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from home.middleware import CompressionMiddleware
+
+BODY = b'<input name="csrfmiddlewaretoken" value="secret">' + b"x" * 2000
+
+
+@override_settings(COMPRESSION_MIN_SIZE=100)
+@mock.patch("home.middleware.brotli")
+class CompressionMiddlewareTests(SimpleTestCase):
+    def compress(self, content_type):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip, br")
+        middleware = CompressionMiddleware(lambda request: HttpResponse(BODY, content_type=content_type))
+        return middleware(request)
+
+    def test_html_uses_gzip_not_brotli(self, brotli):
+        response = self.compress("text/html; charset=utf-8")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        brotli.compress.assert_not_called()
+
+    def test_json_uses_brotli(self, brotli):
+        brotli.compress.return_value = b"br"
+        response = self.compress("application/json")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(response.content, b"br")
@@ -0,0 +1,59 @@
+import unittest
+from datetime import date
+
+from django.contrib.gis.geos import Point
+from django.db import connection
+from django.test import TestCase
+
+from home import partitioning
+from home.models import Asset, Maintenance, Tree
+
+TABLE = "home_maintenance"
+
+
+def count(cursor, relation, where="TRUE"):
+    cursor.execute(f"SELECT count(*) FROM {relation} WHERE {where}")
+    return cursor.fetchone()[0]
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "Phân vùng khai báo chỉ có trên PostgreSQL")
+class PartitionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        tree = Tree.objects.create(code="T-01", species="Sao", health_status="good", geom=Point(106.66, 10.79))
+        cls.asset = Asset.objects.create(tree=tree, asset_type="tree")
+        # Các tháng xa trong quá khứ chưa có phân vùng nên dòng nằm trong phân vùng default
+        cls.months = [date(2001, 1, 1), date(2001, 2, 1)]
+        for month in cls.months:
+            for day in (3, 17):
+                Maintenance.objects.create(
+                    asset=cls.asset, maintenance_type="trim",
+                    maintenance_date=month.replace(day=day), note="cắt tỉa " * 500,
+                )
+
+    def test_create_partition_moves_rows_out_of_default(self):
+        with connection.cursor() as cursor:
+            self.assertEqual(count(cursor, f"{TABLE}_default", "maintenance_date < '2001-02-01'"), 2)
+            self.assertTrue(partitioning.create_partition(cursor, TABLE, self.months[0]))
+            self.assertFalse(partitioning.create_partition(cursor, TABLE, self.months[0]))
+            self.assertEqual(count(cursor, f"{TABLE}_default", "maintenance_date < '2001-02-01'"), 0)
+            self.assertEqual(count(cursor, partitioning.partition_name(TABLE, self.months[0])), 2)
+        self.assertEqual(Maintenance.objects.count(), 4)
+
+    def test_archive_preserves_rows(self):
+        with connection.cursor() as cursor:
+            partitioning.ensure_partitions(cursor, TABLE, self.months[0], self.months[-1])
+            archived, skipped = partitioning.archive_partitions(cursor, TABLE, date(2001, 3, 1))
+            self.assertEqual(archived, [partitioning.partition_name(TABLE, month) for month in self.months])
+            self.assertEqual(skipped, [])
+            self.assertEqual(partitioning.archived_months(TABLE), set(self.months))
+
+            self.assertEqual(Maintenance.objects.count(), 0)
+            self.assertEqual(count(cursor, f"{TABLE}_archive"), 4)
+            cursor.execute(f"SELECT DISTINCT pg_column_compression(note) FROM {TABLE}_archive")
+            self.assertEqual(cursor.fetchall(), [("lz4",)])
+
+        # Phân vùng lưu trữ không giữ khoá ngoại tới home_asset
+        self.asset.delete()
+        with connection.cursor() as cursor:
+            self.assertEqual(count(cursor, f"{TABLE}_archive"), 4)
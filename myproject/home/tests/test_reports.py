@@ -0,0 +1,115 @@
+import csv
+import re
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from home import reports
+from home.models import Asset, Maintenance, ReportSnapshot, Tree
+
+# Thứ Tư; tuần trọn vẹn gần nhất là 05/10 – 11/10/2026
+TODAY = date(2026, 10, 14)
+
+
+class PeriodTests(SimpleTestCase):
+    def test_weekly_period(self):
+        self.assertEqual(reports.weekly_period(TODAY), (date(2026, 10, 5), date(2026, 10, 12)))
+
+    @mock.patch("home.reports.archived_months", return_value=set())
+    def test_point_in_time_reports_only_for_latest_period(self, _archived):
+        latest_end = date(2026, 10, 12)
+        past_end = latest_end - timedelta(days=7)
+        for report_type in reports.POINT_IN_TIME_REPORTS:
+            self.assertTrue(reports.can_generate(report_type, latest_end, TODAY))
+            self.assertFalse(reports.can_generate(report_type, past_end, TODAY))
+        self.assertTrue(reports.can_generate("maintenance_spend", past_end, TODAY))
+
+    @mock.patch("home.reports.archived_months", return_value={date(2026, 9, 1)})
+    def test_archived_months_refused(self, archived):
+        # 28/09 – 04/10 chạm tháng 9 đã lưu trữ; 05/10 – 11/10 thì không
+        self.assertIn("lưu trữ", reports.refusal_reason("maintenance_spend", date(2026, 10, 5), TODAY))
+        self.assertIsNone(reports.refusal_reason("maintenance_spend", date(2026, 10, 12), TODAY))
+        archived.assert_called_with("home_maintenance")
+
+    def test_generate_snapshot_refuses_past_period(self):
+        period_start, period_end = reports.weekly_period()
+        with self.assertRaisesMessage(ValueError, "kỳ đã qua"):
+            reports.generate_snapshot(
+                "open_incidents", period_start - timedelta(days=7), period_end - timedelta(days=7),
+            )
+
+
+def pdf_page_count(path):
+    return len(re.findall(rb"/Type /Page\b(?!s)", Path(path).read_bytes()))
+
+
+class RenderTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def test_write_csv_counts_rows_and_writes_header(self):
+        path = self.tmp / "report.csv"
+        rows = ((f"Tòa {i}", "cao", i) for i in range(3))
+        self.assertEqual(reports._write_csv(path, ["Tòa nhà", "Mức độ", "Số sự cố"], rows), 3)
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            lines = list(csv.reader(f))
+        self.assertEqual(lines[0], ["Tòa nhà", "Mức độ", "Số sự cố"])
+        self.assertEqual(lines[1:], [[f"Tòa {i}", "cao", str(i)] for i in range(3)])
+
+    def test_render_pdf_multiple_pages(self):
+        csv_path, pdf_path = self.tmp / "report.csv", self.tmp / "report.pdf"
+        reports._write_csv(csv_path, ["Mã cây", "Loài"], ((f"T-{i}", "Sao đen") for i in range(120)))
+        reports.render_pdf(csv_path, pdf_path, "Cây nguy hiểm", "01/01/2026 – 07/01/2026")
+        self.assertTrue(pdf_path.read_bytes().startswith(b"%PDF"))
+        # ~35 dòng mỗi trang A4 ngang
+        self.assertEqual(pdf_page_count(pdf_path), 4)
+
+    def test_render_pdf_without_rows(self):
+        csv_path, pdf_path = self.tmp / "empty.csv", self.tmp / "empty.pdf"
+        reports._write_csv(csv_path, ["Mã cây"], [])
+        reports.render_pdf(csv_path, pdf_path, "Cây nguy hiểm", "")
+        self.assertEqual(pdf_page_count(pdf_path), 1)
+
+
+class GenerateSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        tree = Tree.objects.create(code="T-01", species="Sao", health_status="good", geom=Point(106.66, 10.79))
+        asset = Asset.objects.create(tree=tree, asset_type="tree")
+        cls.period_start, cls.period_end = reports.weekly_period()
+        for cost in (Decimal("100000"), Decimal("250000.50")):
+            Maintenance.objects.create(
+                asset=asset, maintenance_type="trim", maintenance_date=cls.period_start, cost=cost,
+            )
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_versions_increment_and_files_are_stored(self):
+        first = reports.generate_snapshot("maintenance_spend", self.period_start, self.period_end)
+        second = reports.generate_snapshot("maintenance_spend", self.period_start, self.period_end, pdf=False)
+
+        self.assertEqual((first.version, second.version), (1, 2))
+        self.assertEqual(ReportSnapshot.objects.filter(report_type="maintenance_spend").count(), 2)
+        self.assertEqual(first.row_count, 1)
+        self.assertEqual(first.summary, {"count": 2, "total_cost": "350000.50"})
+
+        with first.csv_file.open("rb") as f:
+            lines = f.read().decode("utf-8-sig").splitlines()
+        self.assertEqual(lines[0], "Tòa nhà,Loại bảo trì,Số phiếu,Chi phí")
+        self.assertEqual(lines[1], f"{reports.OUTDOOR_LABEL},trim,2,350000.50")
+        with first.pdf_file.open("rb") as f:
+            self.assertTrue(f.read().startswith(b"%PDF"))
+        self.assertFalse(second.pdf_file)
+        self.assertNotEqual(first.csv_file.name, second.csv_file.name)
@@ -0,0 +1,76 @@
+import unittest
+from unittest import mock
+
+from django.conf import settings
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from home import routers
+from home.middleware import ReplicaPinningMiddleware
+from home.models import Building
+
+REPLICA = "replica_1"
+
+
+def routed_view(request):
+    """View ghi lại CSDL mà router chọn cho truy vấn đọc."""
+    return HttpResponse(routers.PrimaryReplicaRouter().db_for_read(Building))
+
+
+@mock.patch("home.routers.replica_aliases", return_value=[REPLICA])
+@mock.patch("home.routers.is_healthy", return_value=True)
+@mock.patch.dict(routers._unhealthy_until, clear=True)
+class ReplicaRoutingTests(SimpleTestCase):
+    def get_alias(self, request, view=routed_view):
+        return routers.use_replica(view)(request).content.decode()
+
+    def test_get_reads_from_replica(self, *_mocks):
+        self.assertEqual(self.get_alias(RequestFactory().get("/")), REPLICA)
+
+    def test_post_reads_from_primary(self, *_mocks):
+        self.assertEqual(self.get_alias(RequestFactory().post("/")), "default")
+
+    def test_pinned_request_reads_from_primary(self, *_mocks):
+        request = RequestFactory().get("/")
+        request.COOKIES[routers.PIN_COOKIE] = "1"
+        self.assertEqual(self.get_alias(request), "default")
+
+    def test_outside_use_replica_reads_from_primary(self, *_mocks):
+        self.assertEqual(routers.PrimaryReplicaRouter().db_for_read(Building), "default")
+        self.assertEqual(routers.PrimaryReplicaRouter().db_for_write(Building), "default")
+
+    def test_operational_error_falls_back_to_primary(self, *_mocks):
+        calls = []
+
+        def flaky_view(request):
+            alias = routers.PrimaryReplicaRouter().db_for_read(Building)
+            calls.append(alias)
+            if alias == REPLICA:
+                raise OperationalError("replica down")
+            return HttpResponse(alias)
+
+        self.assertEqual(self.get_alias(RequestFactory().get("/"), flaky_view), "default")
+        self.assertEqual(calls, [REPLICA, "default"])
+        self.assertIn(REPLICA, routers._unhealthy_until)
+
+    @mock.patch("home.middleware.replica_aliases", return_value=[REPLICA])
+    def test_write_request_sets_pin_cookie(self, *_mocks):
+        middleware = ReplicaPinningMiddleware(lambda request: HttpResponse())
+        self.assertIn(routers.PIN_COOKIE, middleware(RequestFactory().post("/")).cookies)
+        self.assertNotIn(routers.PIN_COOKIE, middleware(RequestFactory().get("/")).cookies)
+
+
+@unittest.skipUnless(REPLICA in settings.DATABASES, "Cần DB_REPLICAS (alias replica_1, TEST MIRROR của default)")
+class MirrorReplicaTests(TestCase):
+    databases = {"default", REPLICA}
+
+    def test_replica_query_sees_primary_data(self):
+        def view(request):
+            queryset = Building.objects.all()
+            return HttpResponse(f"{queryset.db}:{queryset.count()}")
+
+        with mock.patch.dict(routers._unhealthy_until, clear=True), \
+                mock.patch.dict(routers._health_checked, clear=True):
+            response = routers.use_replica(view)(RequestFactory().get("/"))
+        self.assertEqual(response.content.decode(), f"{REPLICA}:{Building.objects.count()}")
@@ -0,0 +1,115 @@
+import math
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from home.geo import METERS_PER_DEGREE
+from home.spatial_index import MAX_RING_SEARCH, PointIndex
+
+CENTER_LON, CENTER_LAT = 106.6655, 10.7984
+CELL_M = 25
+
+
+class BruteForce:
+    """Tập điểm tham chiếu: tính khoảng cách bằng cùng phép chiếu với chỉ mục."""
+
+    def __init__(self, index, ids, lons, lats):
+        self.index = index
+        self.points = {int(pk): (lon, lat) for pk, lon, lat in zip(ids, lons, lats)}
+
+    def distances(self, lon, lat):
+        return {
+            pk: math.hypot((p_lon - lon) * self.index.kx, (p_lat - lat) * self.index.ky)
+            for pk, (p_lon, p_lat) in self.points.items()
+        }
+
+    def nearest(self, lon, lat):
+        distances = self.distances(lon, lat)
+        return min(distances.values()) if distances else None
+
+    def within(self, lon, lat, radius_m):
+        return {pk for pk, distance in self.distances(lon, lat).items() if distance <= radius_m}
+
+
+class PointIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(42)
+
+    def random_points(self, count, spread_deg=0.005):
+        lons = CENTER_LON + self.rng.uniform(-spread_deg, spread_deg, count)
+        lats = CENTER_LAT + self.rng.uniform(-spread_deg, spread_deg, count)
+        return lons, lats
+
+    def assert_matches(self, index, reference, queries=200):
+        # Một phần truy vấn ở xa tập điểm để đi qua nhánh quét toàn bộ sau MAX_RING_SEARCH vòng
+        far = (MAX_RING_SEARCH + 4) * CELL_M / METERS_PER_DEGREE
+        lons, lats = self.random_points(queries, spread_deg=0.006 + far)
+        for lon, lat in zip(lons, lats):
+            expected = reference.nearest(lon, lat)
+            result = index.nearest(lon, lat)
+            if expected is None:
+                self.assertIsNone(result)
+            else:
+                pk, distance = result
+                self.assertAlmostEqual(distance, expected, places=6)
+                self.assertAlmostEqual(reference.distances(lon, lat)[pk], expected, places=6)
+
+            radius = float(self.rng.uniform(5, 120))
+            found = index.within(lon, lat, radius)
+            self.assertEqual({pk for pk, _distance in found}, reference.within(lon, lat, radius))
+            self.assertEqual([d for _pk, d in found], sorted(d for _pk, d in found))
+        self.assertEqual(len(index), len(reference.points))
+
+    def build(self, count=300):
+        ids = np.arange(1, count + 1)
+        lons, lats = self.random_points(count)
+        index = PointIndex(ids, lons, lats, CELL_M)
+        return index, BruteForce(index, ids, lons, lats)
+
+    def apply_changes(self, index, reference):
+        # Di chuyển điểm có sẵn, thêm điểm mới, xóa điểm gốc và điểm vừa thêm
+        moved = self.rng.choice(list(reference.points), 20, replace=False)
+        for pk, lon, lat in zip(moved, *self.random_points(20)):
+            index.upsert(int(pk), lon, lat)
+            reference.points[int(pk)] = (lon, lat)
+        for pk, lon, lat in zip(range(1001, 1031), *self.random_points(30)):
+            index.upsert(pk, lon, lat)
+            reference.points[pk] = (lon, lat)
+        for pk in [*moved[:5].tolist(), 3, 4, 1001, 1002]:
+            index.remove(pk)
+            reference.points.pop(pk, None)
+
+    def test_initial_build_matches_brute_force(self):
+        index, reference = self.build()
+        self.assert_matches(index, reference)
+
+    def test_upserts_and_removes_match_brute_force(self):
+        index, reference = self.build()
+        self.apply_changes(index, reference)
+        self.assertTrue(index._snapshot.delta)
+        self.assert_matches(index, reference)
+
+    @override_settings(SPATIAL_INDEX_DELTA_LIMIT=10)
+    def test_compaction_matches_brute_force(self):
+        index, reference = self.build()
+        self.apply_changes(index, reference)
+        self.assertLessEqual(len(index._snapshot.delta), 10)
+        self.assert_matches(index, reference)
+
+    def test_remove_everything(self):
+        index, reference = self.build(count=5)
+        for pk in range(1, 6):
+            index.remove(pk)
+            reference.points.pop(pk)
+        self.assertIsNone(index.nearest(CENTER_LON, CENTER_LAT))
+        self.assertEqual(index.within(CENTER_LON, CENTER_LAT, 1000), [])
+
+    @override_settings(SPATIAL_INDEX_ORIGIN_LAT=CENTER_LAT)
+    def test_empty_index_uses_campus_latitude(self):
+        index = PointIndex([], [], [], CELL_M)
+        self.assertAlmostEqual(index.kx, METERS_PER_DEGREE * math.cos(math.radians(CENTER_LAT)))
+        index.upsert(1, CENTER_LON, CENTER_LAT)
+        # 0.001 độ kinh độ ở vĩ độ khuôn viên ~ 109.3 m, không phải 111.3 m như ở xích đạo
+        pk, distance = index.nearest(CENTER_LON + 0.001, CENTER_LAT)
+        self.assertEqual(pk, 1)
+        self.assertAlmostEqual(distance, 0.001 * METERS_PER_DEGREE * math.cos(math.radians(CENTER_LAT)), places=3)
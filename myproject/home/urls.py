@@ -5,6 +5,10 @@ from .views import (
     facility_dashboard,
     facility_incident,
     teacher_dashboard,
+    bulk_incidents_api,
+    bulk_equipment_api,
+    report_download,
+    report_latest,
 )
 
 urlpatterns = [
@@ -13,4 +17,8 @@ urlpatterns = [
     path('facility/', facility_dashboard, name='facility_dashboard'),
     path('facility/incidents/', facility_incident, name='facility_incident'),
     path('teacher/', teacher_dashboard, name='teacher_dashboard'),
+    path('api/incidents/bulk/', bulk_incidents_api, name='bulk_incidents_api'),
+    path('api/equipment/bulk/', bulk_equipment_api, name='bulk_equipment_api'),
+    path('reports/<int:pk>.<slug:fmt>', report_download, name='report_download'),
+    path('reports/<slug:report_type>/latest.<slug:fmt>', report_latest, name='report_latest'),
 ]
@@ -1,17 +1,32 @@
-from django.shortcuts import render, redirect
+import json
+
+from django.conf import settings
+from django.db.models import F
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.shortcuts import get_object_or_404, render, redirect
 from django.views import View
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout
 from django.urls import reverse
+from django.utils.http import urlencode
 from django.contrib import messages
+from django.views.decorators.cache import cache_control, never_cache
+from django.views.decorators.http import require_POST
 
 from .forms import (
     BootstrapAuthenticationForm,
     FacilityMaintenanceForm,
     FacilityIncidentForm,
 )
-from django.core.serializers import serialize
+from .analysis import (
+    DATA_NAMESPACE as SPATIAL_NAMESPACE, MAX_RADIUS_M, equipment_coverage, seat_coverage,
+)
+from .cache import INCIDENTS, get_data_version, maintenance_namespace
+from .dedup import OPEN_STATUSES, find_duplicate_candidates, merge_incident
+from .bulk import bulk_update_equipment, bulk_update_incidents
+from .geo import feature_collection
+from .routers import use_replica
 from .models import (
     Building,
     Tree,
@@ -20,6 +35,7 @@ from .models import (
     AppUser,
     Asset,
     Maintenance,
+    ReportSnapshot,
     Room,
 )
 
@@ -38,7 +54,7 @@ class Login(LoginView):
         - Ngược lại => chuyển sang trang bản đồ (map)
         """
         user = self.request.user
-        app_user = AppUser.objects.select_related("role").filter(username=user.username).first()
+        app_user = AppUser.objects.select_related("role").filter(user=user).first()
 
         # 1. Ưu tiên tài khoản admin của Django (superuser / staff)
         if user.is_superuser or user.is_staff:
@@ -59,30 +75,138 @@ class Login(LoginView):
         return reverse("map_view")
 
 
-def map_view(request):
-    # 1. Lấy dữ liệu và chuyển sang GeoJSON
-    # Chúng ta lấy các trường cần thiết để hiển thị Popup (name, description, status...)
-    
-    buildings_geojson = serialize('geojson', Building.objects.all(), 
-                                  geometry_field='geom', 
+def _map_layer_geojson(layer, zoom=None):
+    """
+    Dữ liệu GeoJSON của một lớp bản đồ, hoặc None nếu tên lớp không tồn tại.
+    Tọa độ được PostGIS làm tròn (6 chữ số thập phân); tòa nhà dùng hình học
+    giản lược phù hợp với mức zoom (zoom None = hình gốc).
+    """
+    if layer == "buildings":
+        return feature_collection(Building.objects.all(),
+                                  geometry_field=Building.geometry_for_zoom(zoom),
                                   fields=('name', 'description'))
-    
-    trees_geojson = serialize('geojson', Tree.objects.all(), 
-                              geometry_field='geom', 
-                              fields=('code', 'species', 'health_status'))
-    
-    incidents_geojson = serialize('geojson', Incident.objects.all(),
-                                  geometry_field='geom',
+    if layer == "trees":
+        return feature_collection(Tree.objects.annotate(risk_score=F('asset__risk_score')),
+                                  fields=('code', 'species', 'health_status', 'risk_score'))
+    if layer == "incidents":
+        # Báo cáo trùng đã gộp không hiển thị trên bản đồ
+        return feature_collection(Incident.objects.filter(duplicate_of__isnull=True),
                                   fields=('title', 'status', 'priority'))
+    return None
+
+
+@cache_control(max_age=60)
+@use_replica
+def map_layer(request, layer):
+    """
+    Trả về một lớp dữ liệu bản đồ dạng JSON (tách khỏi HTML để trình duyệt cache riêng).
+    ETag/304 do ConditionalGetMiddleware xử lý; nén do CompressionMiddleware.
+    """
+    try:
+        zoom = int(request.GET["zoom"]) if "zoom" in request.GET else None
+    except ValueError:
+        zoom = None
+
+    data = _map_layer_geojson(layer, zoom)
+    if data is None:
+        raise Http404("Lớp bản đồ không tồn tại")
+    return HttpResponse(data, content_type="application/json")
+
+
+@cache_control(max_age=60)
+@use_replica
+def coverage_layer(request, analysis):
+    """
+    Lớp phân tích vùng phục vụ cho bản đồ (GeoJSON, tính trong PostGIS và cache
+    theo bộ tham số, xem home/analysis.py).
+    - equipment: ?type=projector&status=good&radius=50 -> tòa nhà có / không có thiết bị trong bán kính
+    - seats: ?room_type=lab&radius=300 -> tổng số chỗ các phòng trong bán kính đi bộ
+    """
+    try:
+        if analysis == "equipment":
+            data = equipment_coverage(
+                request.GET.get("type", settings.COVERAGE_EQUIPMENT_TYPE),
+                request.GET.get("radius", settings.COVERAGE_EQUIPMENT_RADIUS_M),
+                statuses=request.GET.get("status", "good").split(","),
+            )
+        elif analysis == "seats":
+            data = seat_coverage(
+                request.GET.get("radius", settings.COVERAGE_WALKING_DISTANCE_M),
+                room_type=request.GET.get("room_type", "lab"),
+            )
+        else:
+            raise Http404("Phân tích không tồn tại")
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return HttpResponse(data, content_type="application/json")
+
+
+@use_replica
+def spatial_lookup(request, kind):
+    """
+    Tra cứu điểm cho thao tác bấm trên bản đồ, dùng chỉ mục trong bộ nhớ
+    (xem home/spatial_index.py).
+    - ?lon=..&lat=..[&max_distance=20] -> đối tượng gần nhất (tối đa max_distance mét)
+    - ?lon=..&lat=..&radius=50         -> các đối tượng trong bán kính, gần nhất trước
+    """
+    # Import khi cần: chỉ tiến trình phục vụ tra cứu mới giữ chỉ mục trong bộ nhớ
+    from . import spatial_index
+
+    if kind not in spatial_index.MODELS:
+        raise Http404("Loại đối tượng không tồn tại")
+    try:
+        lon = float(request.GET["lon"])
+        lat = float(request.GET["lat"])
+        radius = float(request.GET["radius"]) if "radius" in request.GET else None
+        max_distance = float(request.GET["max_distance"]) if "max_distance" in request.GET else None
+    except (KeyError, ValueError):
+        return JsonResponse({"error": "Cần tham số số 'lon', 'lat' (và 'radius' / 'max_distance' nếu có)."}, status=400)
+    if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+        return JsonResponse({"error": "Tọa độ không hợp lệ."}, status=400)
+    if radius is not None and not 0 < radius <= MAX_RADIUS_M:
+        return JsonResponse({"error": f"Bán kính phải trong khoảng (0, {MAX_RADIUS_M}] mét."}, status=400)
+
+    if radius is not None:
+        matches = spatial_index.within(kind, lon, lat, radius)
+    else:
+        match = spatial_index.nearest(kind, lon, lat, max_distance)
+        matches = [match] if match else []
+    return JsonResponse({
+        "kind": kind,
+        "results": [{"id": pk, "distance_m": round(distance, 2)} for pk, distance in matches],
+    })
+
+
+@use_replica
+def map_view(request):
+    # 1. Trang bản đồ chỉ chứa khung HTML + cấu hình; dữ liệu từng lớp được
+    # static/js/map.js tải từ map_layer (JSON, nén và cache riêng).
+    # Tòa nhà được tải lại theo mức zoom để dùng hình học giản lược.
+    map_config = {
+        "layers": {
+            layer: reverse("map_layer", args=[layer])
+            for layer in ("buildings", "trees", "incidents")
+        },
+        "simplifiedZooms": [max_zoom for _field, max_zoom, _tol in Building.SIMPLIFIED_GEOMS],
+        # Lớp phân tích vùng phục vụ, chỉ tải khi người dùng bật trên bản đồ
+        "coverage": {
+            "equipment": reverse("coverage_layer", args=["equipment"]) + "?" + urlencode({
+                "type": settings.COVERAGE_EQUIPMENT_TYPE,
+                "radius": settings.COVERAGE_EQUIPMENT_RADIUS_M,
+            }),
+            "seats": reverse("coverage_layer", args=["seats"]) + "?" + urlencode({
+                "room_type": "lab",
+                "radius": settings.COVERAGE_WALKING_DISTANCE_M,
+            }),
+        },
+    }
 
     # 2. Xác định nút quay lại phù hợp (Admin hoặc Nhân viên CSVC)
     back_url = None
     back_label = None
 
     if request.user.is_authenticated:
-        app_user = AppUser.objects.select_related("role").filter(
-            username=request.user.username
-        ).first()
+        app_user = AppUser.objects.select_related("role").filter(user=request.user).first()
 
         role_name = app_user.role.name.lower() if app_user and app_user.role else None
 
@@ -101,22 +225,32 @@ def map_view(request):
 
     # 3. Truyền dữ liệu sang template
     context = {
-        'buildings_json': buildings_geojson,
-        'trees_json': trees_geojson,
-        'incidents_json': incidents_geojson,
+        'map_config': map_config,
         'back_url': back_url,
         'back_label': back_label,
     }
     return render(request, 'home/map.html', context)
 
 
+def _fragment_cache_context(role_name, **versions):
+    """
+    Biến dùng cho {% cache %} trong template dashboard: các đoạn được cache theo
+    vai trò và phiên bản dữ liệu (tăng khi dữ liệu đổi, xem home/signals.py).
+    """
+    return {
+        "fragment_timeout": getattr(settings, "FRAGMENT_CACHE_TIMEOUT", 600),
+        "cache_role": role_name,
+        "cache_versions": versions,
+    }
+
+
 @login_required
 def admin_dashboard(request):
     """
     Trang quản trị hệ thống dành cho role 'Admin'.
     Nếu user không phải Admin thì tự động chuyển về trang bản đồ.
     """
-    app_user = AppUser.objects.select_related("role").filter(username=request.user.username).first()
+    app_user = AppUser.objects.select_related("role").filter(user=request.user).first()
 
     if not (app_user and app_user.role and app_user.role.name.lower() == "admin"):
         return redirect("map_view")
@@ -125,12 +259,13 @@ def admin_dashboard(request):
 
 
 @login_required
+@use_replica
 def facility_dashboard(request):
     """
     Dashboard dành cho Nhân viên CSVC (role = 'facility_staff').
     Cho phép tạo phiếu bảo trì tài sản (thiết bị / cây) nhưng KHÔNG cho quản lý user & phân quyền.
     """
-    app_user = AppUser.objects.select_related("role").filter(username=request.user.username).first()
+    app_user = AppUser.objects.select_related("role").filter(user=request.user).first()
 
     # Chỉ cho phép role Nhân viên CSVC (tiếng Anh hoặc tiếng Việt)
     if not (
@@ -151,6 +286,7 @@ def facility_dashboard(request):
     else:
         form = FacilityMaintenanceForm()
 
+    # Queryset chỉ được thực thi khi đoạn template đã cache hết hạn
     recent_maintenances = (
         Maintenance.objects.filter(staff=app_user)
         .select_related("asset")
@@ -160,16 +296,21 @@ def facility_dashboard(request):
     context = {
         "form": form,
         "recent_maintenances": recent_maintenances,
+        **_fragment_cache_context(
+            app_user.role.name.lower(),
+            maintenance=get_data_version(maintenance_namespace(app_user.pk)),
+        ),
     }
     return render(request, "home/facility_dashboard.html", context)
 
 
 @login_required
+@use_replica
 def facility_incident(request):
     """
     Trang Báo cáo sự cố dành cho Nhân viên CSVC.
     """
-    app_user = AppUser.objects.select_related("role").filter(username=request.user.username).first()
+    app_user = AppUser.objects.select_related("role").filter(user=request.user).first()
 
     if not (
         app_user
@@ -178,6 +319,7 @@ def facility_incident(request):
     ):
         return redirect("map_view")
 
+    duplicate_candidates = []
     if request.method == "POST":
         form = FacilityIncidentForm(request.POST)
         if form.is_valid():
@@ -191,12 +333,38 @@ def facility_incident(request):
                 incident.geom = asset.tree.geom
 
             incident.status = "open"
-            incident.save()
-            messages.success(request, "Đã ghi nhận báo cáo sự cố thành công.")
-            return redirect("facility_incident")
+
+            # Kiểm tra báo cáo trùng: cùng tài sản hoặc gần vị trí, trong thời gian gần đây
+            merge_into = request.POST.get("merge_into")
+            if merge_into:
+                # Người dùng chọn gộp vào một sự cố đang mở đã có
+                target = Incident.objects.filter(
+                    pk=merge_into, status__in=OPEN_STATUSES, duplicate_of__isnull=True
+                ).first()
+                if target:
+                    merge_incident(incident, target)
+                    messages.success(request, f"Đã gộp báo cáo vào sự cố \"{target.title}\".")
+                    return redirect("facility_incident")
+            elif not request.POST.get("confirm_new"):
+                duplicate_candidates = list(
+                    find_duplicate_candidates(incident.asset, incident.geom)[:5]
+                )
+                if duplicate_candidates and settings.INCIDENT_DEDUP_AUTO_MERGE:
+                    target = duplicate_candidates[0]
+                    merge_incident(incident, target)
+                    messages.success(
+                        request, f"Sự cố đã được báo trước đó, đã gộp vào \"{target.title}\"."
+                    )
+                    return redirect("facility_incident")
+
+            if not duplicate_candidates:
+                incident.save()
+                messages.success(request, "Đã ghi nhận báo cáo sự cố thành công.")
+                return redirect("facility_incident")
     else:
         form = FacilityIncidentForm()
 
+    # Danh sách chung cho mọi nhân viên; chỉ truy vấn khi đoạn template đã cache hết hạn
     recent_incidents = (
         Incident.objects.select_related("asset", "incident_type")
         .order_by("-reported_at")[:5]
@@ -205,6 +373,11 @@ def facility_incident(request):
     context = {
         "form": form,
         "recent_incidents": recent_incidents,
+        "duplicate_candidates": duplicate_candidates,
+        **_fragment_cache_context(
+            app_user.role.name.lower(),
+            incidents=get_data_version(INCIDENTS),
+        ),
     }
     return render(request, "home/facility_incident.html", context)
 
@@ -219,13 +392,14 @@ def logout_view(request):
 
 
 @login_required
+@use_replica
 def teacher_dashboard(request):
     """
     Dashboard read-only cho Giảng viên:
     - Xem danh sách phòng học và trạng thái (tốt / hỏng / đang sửa) dựa trên thiết bị trong phòng
     - Chuyển sang bản đồ để xem vị trí
     """
-    app_user = AppUser.objects.select_related("role").filter(username=request.user.username).first()
+    app_user = AppUser.objects.select_related("role").filter(user=request.user).first()
 
     if not (
         app_user
@@ -234,38 +408,187 @@ def teacher_dashboard(request):
     ):
         return redirect("map_view")
 
-    # Lấy danh sách phòng + thiết bị để tính trạng thái
-    rooms = (
-        Room.objects.select_related("building")
-        .prefetch_related("equipment_set")
-        .all()
-    )
-
-    room_status_list = []
-    for room in rooms:
-        statuses = {eq.status for eq in room.equipment_set.all()}
-        if "broken" in statuses:
-            status_label = "Hỏng"
-            status_badge = "danger"
-        elif "maintenance" in statuses:
-            status_label = "Đang sửa"
-            status_badge = "warning"
-        elif statuses:
-            status_label = "Hoạt động tốt"
-            status_badge = "success"
-        else:
-            status_label = "Chưa có thiết bị"
-            status_badge = "secondary"
-
-        room_status_list.append(
-            {
-                "room": room,
-                "status_label": status_label,
-                "status_badge": status_badge,
-            }
+    def room_status_list():
+        """
+        Danh sách phòng + trạng thái tính từ thiết bị trong phòng. Truyền sang
+        template dạng hàm nên chỉ chạy khi đoạn template đã cache hết hạn.
+        """
+        rooms = (
+            Room.objects.select_related("building")
+            .prefetch_related("equipment_set")
+            .all()
         )
 
+        result = []
+        for room in rooms:
+            statuses = {eq.status for eq in room.equipment_set.all()}
+            if "broken" in statuses:
+                status_label = "Hỏng"
+                status_badge = "danger"
+            elif "maintenance" in statuses:
+                status_label = "Đang sửa"
+                status_badge = "warning"
+            elif statuses:
+                status_label = "Hoạt động tốt"
+                status_badge = "success"
+            else:
+                status_label = "Chưa có thiết bị"
+                status_badge = "secondary"
+
+            result.append(
+                {
+                    "room": room,
+                    "status_label": status_label,
+                    "status_badge": status_badge,
+                }
+            )
+        return result
+
     context = {
         "room_status_list": room_status_list,
+        **_fragment_cache_context(
+            app_user.role.name.lower(),
+            rooms=get_data_version(SPATIAL_NAMESPACE),
+        ),
     }
-    return render(request, "home/teacher_dashboard.html", context)
\ No newline at end of file
+    return render(request, "home/teacher_dashboard.html", context)
+
+
+def _bulk_api_staff(request):
+    """
+    Kiểm tra quyền dùng API thao tác hàng loạt (Nhân viên CSVC, role Admin hoặc staff Django).
+    Trả về (có quyền hay không, AppUser tương ứng để ghi vào phiếu bảo trì).
+    """
+    app_user = AppUser.objects.select_related("role").filter(user=request.user).first()
+    role_name = app_user.role.name.lower() if app_user and app_user.role else None
+    allowed = request.user.is_staff or role_name in ("admin", "facility_staff", "nhân viên csvc")
+    return allowed, app_user
+
+
+def _parse_bulk_payload(request):
+    """
+    Đọc body JSON của API hàng loạt; trả về None nếu thiếu danh sách 'ids' hoặc
+    có id không phải số nguyên.
+    """
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("ids"), list) or not data["ids"]:
+        return None
+    # bool là lớp con của int nhưng true/false không phải id
+    if not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in data["ids"]):
+        return None
+    return data
+
+
+@login_required
+@require_POST
+def bulk_incidents_api(request):
+    """
+    API cập nhật hàng loạt sự cố (một câu UPDATE cho tất cả id).
+    Body JSON: {"ids": [1, 2, ...], "status": "closed", "priority": "high",
+                "log_maintenance": true, "maintenance_type": "repair", "note": "..."}
+    """
+    allowed, app_user = _bulk_api_staff(request)
+    if not allowed:
+        return JsonResponse({"error": "Không có quyền thực hiện thao tác này."}, status=403)
+
+    data = _parse_bulk_payload(request)
+    if data is None:
+        return JsonResponse({"error": "Dữ liệu không hợp lệ: cần danh sách 'ids' là các số nguyên."}, status=400)
+
+    try:
+        updated, logged = bulk_update_incidents(
+            data["ids"],
+            status=data.get("status"),
+            priority=data.get("priority"),
+            staff=app_user,
+            log_maintenance=bool(data.get("log_maintenance")),
+            maintenance_type=data.get("maintenance_type", "repair"),
+            note=data.get("note"),
+        )
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    return JsonResponse({"updated": updated, "maintenance_logged": logged})
+
+
+@login_required
+@require_POST
+def bulk_equipment_api(request):
+    """
+    API đổi trạng thái hàng loạt thiết bị (ví dụ đánh dấu đã sửa xong).
+    Body JSON: {"ids": [1, 2, ...], "status": "good",
+                "log_maintenance": true, "maintenance_type": "repair", "note": "..."}
+    """
+    allowed, app_user = _bulk_api_staff(request)
+    if not allowed:
+        return JsonResponse({"error": "Không có quyền thực hiện thao tác này."}, status=403)
+
+    data = _parse_bulk_payload(request)
+    if data is None or not data.get("status"):
+        return JsonResponse({"error": "Dữ liệu không hợp lệ: cần 'ids' và 'status'."}, status=400)
+
+    try:
+        updated, logged = bulk_update_equipment(
+            data["ids"],
+            data["status"],
+            staff=app_user,
+            log_maintenance=bool(data.get("log_maintenance")),
+            maintenance_type=data.get("maintenance_type", "repair"),
+            note=data.get("note"),
+        )
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    return JsonResponse({"updated": updated, "maintenance_logged": logged})
+
+
+def _can_view_reports(request):
+    """Báo cáo quản lý: staff Django hoặc role Admin."""
+    if request.user.is_staff:
+        return True
+    app_user = AppUser.objects.select_related("role").filter(user=request.user).first()
+    return bool(app_user and app_user.role and app_user.role.name.lower() == "admin")
+
+
+REPORT_FORMATS = {"csv": "csv_file", "pdf": "pdf_file"}
+
+
+@login_required
+@cache_control(private=True, max_age=86400)
+def report_download(request, pk, fmt):
+    """
+    Tải tệp báo cáo đã tạo sẵn (home/reports.py). Mỗi phiên bản không đổi sau
+    khi tạo nên trình duyệt được cache.
+    """
+    if fmt not in REPORT_FORMATS:
+        raise Http404("Định dạng không hỗ trợ")
+    if not _can_view_reports(request):
+        return HttpResponseForbidden("Không có quyền xem báo cáo.")
+    snapshot = get_object_or_404(ReportSnapshot, pk=pk)
+    file = getattr(snapshot, REPORT_FORMATS[fmt])
+    if not file:
+        raise Http404("Báo cáo chưa có tệp định dạng này")
+    return FileResponse(
+        file.open("rb"),
+        as_attachment=True,
+        filename=f"{snapshot.report_type}_{snapshot.period_start:%Y%m%d}_v{snapshot.version}.{fmt}",
+    )
+
+
+@login_required
+@never_cache
+def report_latest(request, report_type, fmt):
+    """Chuyển tới phiên bản mới nhất của kỳ gần nhất cho một loại báo cáo."""
+    if not _can_view_reports(request):
+        return HttpResponseForbidden("Không có quyền xem báo cáo.")
+    snapshot = (
+        ReportSnapshot.objects.filter(report_type=report_type)
+        .order_by("-period_start", "-version")
+        .first()
+    )
+    if snapshot is None:
+        raise Http404("Chưa có báo cáo")
+    return redirect("report_download", pk=snapshot.pk, fmt=fmt)
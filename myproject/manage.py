@@ -3,10 +3,27 @@
 import os
 import sys
 
+# Lệnh nền / chạy ngắn dùng cấu hình gọn (myproject/settings_lean.py) để khởi động nhanh
+LEAN_COMMANDS = {
+    'run_worker',
+    'generate_reports',
+    'manage_partitions',
+    'compute_asset_health',
+    'dedupe_incidents',
+    'refresh_building_geoms',
+    'provision_users',
+    'bench_spatial_index',
+    'bench_startup',
+}
+
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    os.environ.setdefault(
+        'DJANGO_SETTINGS_MODULE',
+        'myproject.settings_lean' if command in LEAN_COMMANDS else 'myproject.settings',
+    )
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
@@ -17,6 +17,12 @@ from pathlib import Path
 # ... (Code cũ của bạn giữ nguyên) ...
 
 # --- CẤU HÌNH GDAL ĐỘNG (TEAMWORK FRIENDLY) ---
+# Đặt sẵn GDAL_LIBRARY_PATH / GEOS_LIBRARY_PATH trong biến môi trường (máy chủ,
+# worker) thì bỏ qua bước dò tìm, kể cả bước Django tự dò bằng
+# ctypes.util.find_library (mỗi tên thư viện thử ~10 ms) ở mỗi lần khởi động.
+GDAL_LIBRARY_PATH = os.environ.get('GDAL_LIBRARY_PATH') or None
+GEOS_LIBRARY_PATH = os.environ.get('GEOS_LIBRARY_PATH') or None
+
 if os.name == 'nt':
     # 1. Tự động lấy đường dẫn venv của người đang chạy lệnh
     # sys.prefix sẽ trả về: C:\Users\ACER\...\venv (trên máy bạn)
@@ -35,23 +41,28 @@ if os.name == 'nt':
             except Exception:
                 pass
 
-        # 3. Thêm vào biến môi trường PATH
-        os.environ['PATH'] = str(OSGEO_PATH) + ';' + os.environ['PATH']
+        # 3. Thêm vào biến môi trường PATH (tiến trình con đã thừa hưởng thì thôi)
+        if str(OSGEO_PATH) not in os.environ['PATH'].split(';'):
+            os.environ['PATH'] = str(OSGEO_PATH) + ';' + os.environ['PATH']
 
         # 4. Tự động tìm tên file DLL chính xác (gdal308.dll, gdal309.dll...)
         # Giúp team member dùng version khác nhau vẫn chạy được
-        gdal_lib_name = None
-        for f in os.listdir(str(OSGEO_PATH)):
-            # Tìm file bắt đầu bằng gdal, kết thúc bằng .dll và không phải gdal1xxx
-            if f.startswith('gdal') and f.endswith('.dll') and '1' not in f[0:4]:
-                gdal_lib_name = f
-                break
-
-        if gdal_lib_name:
-            GDAL_LIBRARY_PATH = str(OSGEO_PATH / gdal_lib_name)
-            GEOS_LIBRARY_PATH = str(OSGEO_PATH / 'geos_c.dll')
-        else:
-            print("⚠️ GDAL Warning: Không tìm thấy file DLL gdalxxx.dll trong osgeo")
+        if not GDAL_LIBRARY_PATH:
+            gdal_lib_name = None
+            for f in os.listdir(str(OSGEO_PATH)):
+                # Tìm file bắt đầu bằng gdal, kết thúc bằng .dll và không phải gdal1xxx
+                if f.startswith('gdal') and f.endswith('.dll') and '1' not in f[0:4]:
+                    gdal_lib_name = f
+                    break
+
+            if gdal_lib_name:
+                GDAL_LIBRARY_PATH = str(OSGEO_PATH / gdal_lib_name)
+                GEOS_LIBRARY_PATH = GEOS_LIBRARY_PATH or str(OSGEO_PATH / 'geos_c.dll')
+                # Tiến trình con (worker, ProcessPoolExecutor...) dùng lại, không dò lại
+                os.environ['GDAL_LIBRARY_PATH'] = GDAL_LIBRARY_PATH
+                os.environ['GEOS_LIBRARY_PATH'] = GEOS_LIBRARY_PATH
+            else:
+                print("⚠️ GDAL Warning: Không tìm thấy file DLL gdalxxx.dll trong osgeo")
     else:
         # Trường hợp máy đồng nghiệp chưa cài thư viện
         print(f"⚠️ GDAL Warning: Chưa cài đặt thư viện GDAL tại {OSGEO_PATH}")
@@ -89,10 +100,18 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Phục vụ file tĩnh đã băm tên + nén sẵn (gzip/brotli) với cache dài hạn
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # Nén HTML/JSON (brotli nếu có thư viện, ngược lại gzip)
+    'home.middleware.CompressionMiddleware',
+    # ETag + 304 Not Modified cho các lớp dữ liệu bản đồ
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Sau request ghi, đọc từ primary một lúc (read-your-writes khi có bản sao)
+    'home.middleware.ReplicaPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -131,6 +150,25 @@ DATABASES = {
     }
 }
 
+# Bản sao chỉ đọc (home/routers.py): DB_REPLICAS="host:port/tên_csdl,host2:port/tên_csdl".
+# Phần nào bỏ trống thì lấy như `default`, nên khi thử nghiệm trên một máy có
+# thể dùng CSDL thứ hai trên cùng instance, ví dụ DB_REPLICAS="/quan_ly_csht_replica".
+for _index, _spec in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1):
+    _host_port, _, _name = _spec.strip().partition('/')
+    _host, _, _port = _host_port.partition(':')
+    DATABASES[f'replica_{_index}'] = {
+        **DATABASES['default'],
+        'HOST': _host or DATABASES['default']['HOST'],
+        'PORT': _port or DATABASES['default']['PORT'],
+        'NAME': _name or DATABASES['default']['NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['home.routers.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = 5               # đọc từ primary trong bấy nhiêu giây sau khi ghi
+REPLICA_MAX_LAG_SECONDS = 30          # bản sao trễ hơn mức này thì không dùng
+REPLICA_HEALTH_CHECK_INTERVAL = 30    # giây giữa hai lần kiểm tra / thử lại bản sao
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -151,6 +189,19 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Băm mật khẩu: PBKDF2 với số vòng lặp cấu hình được (home/hashers.py).
+# Tăng PASSWORD_PBKDF2_ITERATIONS thì mật khẩu cũ được băm lại khi người dùng đăng nhập.
+PASSWORD_HASHERS = [
+    'home.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+# None = mặc định của Django; giá trị nhỏ hơn mặc định bị bỏ qua (chỉ nâng lên được).
+PASSWORD_PBKDF2_ITERATIONS = None
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
 
@@ -167,6 +218,29 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+STATICFILES_DIRS = [BASE_DIR / 'static']
+# Thư mục đích của `manage.py collectstatic`
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Tệp do ứng dụng tạo (báo cáo CSV / PDF). Không phục vụ công khai qua MEDIA_URL:
+# tải về qua view report_download có kiểm tra quyền.
+MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_URL = 'media/'
+
+# File tĩnh được băm tên (app.3f2a1b.css) và nén sẵn .gz/.br khi collectstatic,
+# WhiteNoise gửi kèm Cache-Control max-age 10 năm cho các file đã băm tên.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+
+# Chỉ nén phản hồi lớn hơn ngưỡng này (byte)
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 5
 
 # settings.py
 
@@ -176,3 +250,71 @@ LOGIN_REDIRECT_URL = 'home'
 # Sau khi logout, nhảy về trang login (hoặc trang chủ tùy bạn)
 LOGOUT_REDIRECT_URL = 'login'
 
+
+# Phát hiện sự cố trùng lặp khi Nhân viên CSVC gửi báo cáo (home/dedup.py):
+# cùng tài sản hoặc cách nhau không quá INCIDENT_DEDUP_RADIUS_M mét, trong
+# INCIDENT_DEDUP_WINDOW_HOURS giờ. Bật AUTO_MERGE để tự gộp thay vì gợi ý.
+INCIDENT_DEDUP_RADIUS_M = 15
+INCIDENT_DEDUP_WINDOW_HOURS = 48
+INCIDENT_DEDUP_AUTO_MERGE = False
+
+# Hàng đợi công việc nền (home/jobs.py, chạy bằng `manage.py run_worker`)
+JOB_WORKER_CONCURRENCY = 2      # số luồng mỗi tiến trình worker
+JOB_POLL_INTERVAL = 1.0         # giây chờ khi hàng đợi trống
+JOB_RETRY_DELAY = 30            # giây chờ trước lần thử lại đầu tiên (nhân đôi mỗi lần)
+JOB_LOCK_TIMEOUT = 600          # việc 'running' không có heartbeat quá thời gian này được coi là treo
+JOB_HEARTBEAT_INTERVAL = None   # giây giữa hai lần cập nhật locked_at (None = JOB_LOCK_TIMEOUT / 4)
+JOBS_RUN_EAGERLY = False        # True: chạy việc ngay trong request, không cần worker
+
+# Phân vùng theo tháng cho home_incident / home_maintenance (home/partitioning.py,
+# `manage.py manage_partitions`). Phân vùng cũ hơn PARTITION_HOT_MONTHS tháng được
+# chép sang bảng <bảng>_archive (cột văn bản nén lz4, bỏ khoá ngoại); có thể đặt
+# chúng trên tablespace lưu trữ riêng.
+PARTITION_MONTHS_AHEAD = 3
+PARTITION_HOT_MONTHS = 12
+PARTITION_ARCHIVE_TABLESPACE = None
+
+# Cache cho kết quả phân tích, đoạn template dashboard và phiên bản dữ liệu
+# (home/cache.py). Phiên bản chỉ được tăng ở tiến trình ghi dữ liệu, nên khi chạy
+# nhiều tiến trình web / worker phải dùng cache chung: REDIS_URL="redis://host:6379/0"
+# (cần gói redis). Không đặt thì dùng LocMemCache riêng từng tiến trình, và các
+# tiến trình khác chỉ thấy dữ liệu mới sau LOCAL_CACHE_TIMEOUT giây.
+REDIS_URL = os.environ.get('REDIS_URL') or None
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'quan-ly-csht',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'quan-ly-csht',
+        }
+    }
+LOCAL_CACHE_TIMEOUT = 30
+
+# Phân tích vùng phục vụ trên bản đồ (map/coverage/...)
+COVERAGE_EQUIPMENT_TYPE = 'projector'   # loại thiết bị mặc định của lớp "Thiết bị trong bán kính"
+COVERAGE_EQUIPMENT_RADIUS_M = 50
+COVERAGE_WALKING_DISTANCE_M = 300       # khoảng cách đi bộ khi tính số chỗ phòng lab
+ANALYSIS_CACHE_TIMEOUT = 600 if REDIS_URL else LOCAL_CACHE_TIMEOUT     # giây
+
+# Đoạn template và danh sách lựa chọn của dashboard được cache theo phiên bản dữ
+# liệu (home/cache.py). Với cache chung timeout chỉ để dọn các khoá cũ; với
+# LocMemCache nó là giới hạn thời gian thấy dữ liệu cũ ở tiến trình khác.
+FRAGMENT_CACHE_TIMEOUT = 600 if REDIS_URL else LOCAL_CACHE_TIMEOUT
+
+# Chỉ mục không gian trong bộ nhớ cho tra cứu điểm (home/spatial_index.py)
+SPATIAL_INDEX_ENABLED = True        # False: mọi tra cứu đi thẳng PostGIS
+SPATIAL_INDEX_CELL_M = 25           # cạnh ô lưới (mét)
+SPATIAL_INDEX_MAX_AGE = 300         # giây; xây lại để thấy thay đổi từ tiến trình khác
+SPATIAL_INDEX_DELTA_LIMIT = 1000    # số điểm thay đổi tối đa trước khi gộp lại
+SPATIAL_INDEX_ORIGIN_LAT = 10.7984  # vĩ độ khuôn viên (tâm bản đồ), dùng khi xây chỉ mục từ bảng rỗng
+
+# Báo cáo định kỳ (home/reports.py, `manage.py generate_reports` chạy hàng tuần)
+# Font TrueType có dấu tiếng Việt cho PDF; None thì dùng DejaVuSans đi kèm (home/fonts/).
+REPORT_PDF_FONT = os.environ.get('REPORT_PDF_FONT') or None
@@ -0,0 +1,21 @@
+"""
+Cấu hình gọn cho worker và các lệnh quản trị chạy ngắn (manage.py tự chọn cho
+các lệnh trong LEAN_COMMANDS; hoặc đặt DJANGO_SETTINGS_MODULE=myproject.settings_lean).
+
+Bỏ admin, sessions, messages, staticfiles, middleware và URLconf đầy đủ: khi
+khởi động, lệnh không phải nạp admin của các app, còn system checks không phải
+import views / forms. Không dùng cho migrate, runserver, collectstatic hay WSGI.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS
+
+LEAN_EXCLUDED_APPS = {
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+}
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in LEAN_EXCLUDED_APPS]
+MIDDLEWARE = []
+ROOT_URLCONF = 'myproject.urls_lean'
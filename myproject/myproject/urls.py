@@ -22,6 +22,12 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('home.urls')),
     path('map/', core_views.map_view, name='map_view'),  # Đường dẫn vào bản đồ
+    # Dữ liệu GeoJSON của từng lớp bản đồ (buildings / trees / incidents)
+    path('map/layers/<slug:layer>.json', core_views.map_layer, name='map_layer'),
+    # Phân tích vùng phục vụ (equipment / seats), GeoJSON theo tòa nhà
+    path('map/coverage/<slug:analysis>.json', core_views.coverage_layer, name='coverage_layer'),
+    # Tra cứu điểm gần nhất / trong bán kính (tree / equipment / room)
+    path('map/lookup/<slug:kind>.json', core_views.spatial_lookup, name='spatial_lookup'),
     # Đăng xuất: dùng view custom, luôn quay về /login/
     path('logout/', core_views.logout_view, name='logout'),
 ]
@@ -0,0 +1,4 @@
+"""
+URLconf rỗng cho settings_lean (worker / lệnh quản trị không phục vụ HTTP).
+"""
+urlpatterns = []
@@ -0,0 +1,176 @@
+(function () {
+    // Cấu hình do map_view truyền sang (URL các lớp dữ liệu, các mức zoom có hình giản lược)
+    var config = JSON.parse(document.getElementById('map-config').textContent);
+
+    // --- A. Khởi tạo bản đồ ---
+    // Tọa độ HCMUNRE (Lê Văn Sỹ): [10.7984, 106.6655]
+    var map = L.map('map').setView([10.7984, 106.6655], 18);
+
+    // --- B. Thêm lớp nền (Base Map) ---
+    L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+        attribution: '&copy; OpenStreetMap contributors'
+    }).addTo(map);
+
+    // --- C. Định nghĩa Style cho từng lớp ---
+
+    // 1. Style Tòa nhà (Màu xanh dương đậm, viền rõ)
+    var buildingStyle = {
+        "color": "#2980b9",
+        "weight": 3,
+        "opacity": 1,
+        "fillColor": "#3498db",
+        "fillOpacity": 0.5
+    };
+
+    // 2. Style Cây (Hình tròn màu xanh lá)
+    // Tô màu theo điểm rủi ro (0–100) nếu đã được tính, ngược lại theo tình trạng
+    function treeColor(properties) {
+        var risk = properties.risk_score;
+        if (risk !== null && risk !== undefined) {
+            if (risk >= 60) return "#c0392b"; // Đỏ
+            if (risk >= 35) return "#f39c12"; // Cam
+            return "#27ae60";                 // Xanh lá
+        }
+        if (properties.health_status == 'diseased') return "#f39c12"; // Cam
+        if (properties.health_status == 'dangerous') return "#c0392b"; // Đỏ
+        return "#27ae60"; // Xanh lá mặc định
+    }
+
+    function treePoint(feature, latlng) {
+        var color = treeColor(feature.properties);
+
+        return L.circleMarker(latlng, {
+            radius: 5,
+            fillColor: color,
+            color: "#fff",
+            weight: 1,
+            opacity: 1,
+            fillOpacity: 1
+        });
+    }
+
+    // 3. Style Sự cố (Hình tròn nhấp nháy đỏ)
+    function incidentPoint(feature, latlng) {
+        return L.circleMarker(latlng, {
+            radius: 10,
+            fillColor: "#e74c3c",
+            color: "#c0392b",
+            weight: 2,
+            opacity: 1,
+            fillOpacity: 0.8
+        });
+    }
+
+    // --- D. Tạo các lớp (dữ liệu được tải riêng ở bước E) ---
+
+    // Lớp Tòa nhà
+    var buildingsLayer = L.geoJSON(null, {
+        style: buildingStyle,
+        onEachFeature: function (feature, layer) {
+            layer.bindPopup("<b>🏢 " + feature.properties.name + "</b><br>" + feature.properties.description);
+        }
+    }).addTo(map);
+
+    // Lớp Cây xanh
+    var treesLayer = L.geoJSON(null, {
+        pointToLayer: treePoint,
+        onEachFeature: function (feature, layer) {
+            var status = feature.properties.health_status;
+            var icon = "🌳";
+            if (status == 'dangerous') icon = "⚠️";
+            var risk = feature.properties.risk_score;
+            var riskText = (risk !== null && risk !== undefined) ? "<br>Điểm rủi ro: " + risk.toFixed(0) + "/100" : "";
+            layer.bindPopup("<b>" + icon + " Cây: " + feature.properties.species + "</b><br>Mã: " + feature.properties.code + "<br>Tình trạng: " + status + riskText);
+        }
+    }).addTo(map);
+
+    // Lớp Sự cố
+    var incidentsLayer = L.geoJSON(null, {
+        pointToLayer: incidentPoint,
+        onEachFeature: function (feature, layer) {
+            var priority = feature.properties.priority;
+            var color = priority == 'high' ? 'red' : 'black';
+            layer.bindPopup("<b>🔥 SỰ CỐ: " + feature.properties.title + "</b><br>Mức độ: <span style='color:" + color + "'><b>" + priority.toUpperCase() + "</b></span><br>Trạng thái: " + feature.properties.status);
+        }
+    }).addTo(map);
+
+    // --- E. Tải dữ liệu các lớp (JSON được nén và cache riêng với HTML) ---
+    function loadLayer(layer, url) {
+        return fetch(url, { credentials: 'same-origin' })
+            .then(function (response) { return response.json(); })
+            .then(function (data) {
+                layer.clearLayers();
+                layer.addData(data);
+            });
+    }
+
+    // Mức zoom "làm tròn" tương ứng với hình học giản lược của tòa nhà;
+    // null = dùng hình gốc. Chỉ tải lại khi chuyển sang mức khác.
+    function buildingZoomLevel(zoom) {
+        for (var i = 0; i < config.simplifiedZooms.length; i++) {
+            if (zoom <= config.simplifiedZooms[i]) return config.simplifiedZooms[i];
+        }
+        return null;
+    }
+
+    var currentBuildingZoom;
+    function loadBuildings() {
+        var level = buildingZoomLevel(map.getZoom());
+        if (level === currentBuildingZoom) return;
+        currentBuildingZoom = level;
+        var url = config.layers.buildings + (level === null ? '' : '?zoom=' + level);
+        loadLayer(buildingsLayer, url);
+    }
+
+    loadBuildings();
+    map.on('zoomend', loadBuildings);
+    loadLayer(treesLayer, config.layers.trees);
+    loadLayer(incidentsLayer, config.layers.incidents);
+
+    // --- F. Lớp phân tích vùng phục vụ (chỉ tải khi được bật) ---
+
+    // Tòa nhà có thiết bị trong bán kính: xanh; chưa có: đỏ
+    var equipmentCoverageLayer = L.geoJSON(null, {
+        style: function (feature) {
+            var covered = feature.properties.covered;
+            return { color: covered ? "#27ae60" : "#c0392b", weight: 2, fillOpacity: 0.4 };
+        },
+        onEachFeature: function (feature, layer) {
+            layer.bindPopup("<b>🏢 " + feature.properties.name + "</b><br>Thiết bị trong bán kính: " + feature.properties.equipment_count);
+        }
+    });
+
+    // Số chỗ phòng lab trong bán kính đi bộ: càng nhiều càng đậm
+    var seatCoverageLayer = L.geoJSON(null, {
+        style: function (feature) {
+            var seats = feature.properties.seats;
+            return { color: "#8e44ad", weight: 2, fillOpacity: Math.min(0.1 + seats / 200, 0.8) };
+        },
+        onEachFeature: function (feature, layer) {
+            layer.bindPopup("<b>🏢 " + feature.properties.name + "</b><br>Chỗ phòng lab trong bán kính đi bộ: " + feature.properties.seats + " (" + feature.properties.room_count + " phòng)");
+        }
+    });
+
+    var coverageUrls = [
+        [equipmentCoverageLayer, config.coverage.equipment],
+        [seatCoverageLayer, config.coverage.seats]
+    ];
+    map.on('overlayadd', function (event) {
+        for (var i = 0; i < coverageUrls.length; i++) {
+            if (coverageUrls[i][0] === event.layer && !coverageUrls[i].loaded) {
+                coverageUrls[i].loaded = true;
+                loadLayer(coverageUrls[i][0], coverageUrls[i][1]);
+            }
+        }
+    });
+
+    // --- G. Bộ điều khiển Layer ---
+    var overlayMaps = {
+        "Tòa nhà": buildingsLayer,
+        "Cây xanh": treesLayer,
+        "Sự cố": incidentsLayer,
+        "Thiết bị trong bán kính": equipmentCoverageLayer,
+        "Chỗ phòng lab (đi bộ)": seatCoverageLayer
+    };
+    L.control.layers(null, overlayMaps).addTo(map);
+})();